@@ -2,8 +2,12 @@
 from ev3 import *
 from pprint import pformat
 from subprocess import check_output
+from twophase_python.client import SolverClient, SolverError, DEFAULT_PORT
+from twophase_python.robotcost import RobotCostModel
 import json
 import signal
+import socket
+import time
 
 log = logging.getLogger(__name__)
 
@@ -22,6 +26,9 @@ class Rubiks(Robot):
     hold_cube_pos = 85
     rotate_speed = 600
     corner_to_edge_diff = 60
+    solve_timeout = 60
+    # Every move of the robot takes seconds, so spend up to this long on finding a solution it executes faster
+    solve_improve_timeout = 3
 
     def __init__(self):
         Robot.__init__(self)
@@ -40,6 +47,7 @@ class Rubiks(Robot):
         self.server_ip = None
         self.server_username = None
         self.server_path = None
+        self.solver_port = DEFAULT_PORT
         self.rgb_solver = None
         signal.signal(signal.SIGTERM, self.signal_term_handler)
         signal.signal(signal.SIGINT, self.signal_int_handler)
@@ -506,27 +514,36 @@ class Rubiks(Robot):
                     elif key == 'path':
                         self.server_path = value
                         log.info("server_path %s" % self.server_path)
+                    elif key == 'solver_port':
+                        self.solver_port = int(value)
+                        log.info("solver_port %s" % self.solver_port)
 
     def resolve(self):
 
         run_cubex_ev3 = True
 
-        if self.server_username and self.server_ip and self.server_path:
-            output = Popen(
-                ['ssh',
-                 '%s@%s' % (self.server_username, self.server_ip),
-                 '%s/python/pyev3/twophase_python/solve.py %s' %\
-                 (self.server_path, ''.join(map(str, self.cube_kociemba)))],
-                stdout=PIPE).communicate()[0]
-            output = output.strip().strip()
+        if self.server_ip:
+            client = SolverClient('%s:%d' % (self.server_ip, self.solver_port))
+            try:
+                output = client.solve(''.join(map(str, self.cube_kociemba)), 21, Rubiks.solve_timeout,
+                                      Rubiks.solve_improve_timeout, self.state)
+            except (socket.error, SolverError) as e:
+                output = None
+                log.warning("Our solver at %s failed (%s), we will run cubex_ev3 locally" % (self.server_ip, e))
+                self.leds.set_all('orange')
+            finally:
+                client.close()
 
             if output:
                 actions = output.split(' ')
+                model = RobotCostModel()
+                counts = model.counts(actions, self.state)
+                predicted = model.cost(actions, self.state)
+                start = time.time()
                 self.run_kociemba_actions(actions)
+                log.info("Solution executed in %.1fs, predicted %.1fs, actions %s" %
+                         (time.time() - start, predicted, counts))
                 run_cubex_ev3 = False
-            else:
-                log.warning("Our connection to %s failed, we will run cubex_ev3 locally" % self.server_ip)
-                self.leds.set_all('orange')
 
         if run_cubex_ev3:
             if os.path.isfile('../utils/rubiks_solvers/cubex_C_ARM/cubex_ev3'):
@@ -0,0 +1,158 @@
+"""
+Solve many cubes, or the six variants of one cube, on a pool of worker processes that share one table store, see
+tablestore.py. Every worker searches with its own instance of the kernel, Search or a fastsearch.FastSearch with its
+arguments, see Search.kernel().
+"""
+
+import json
+import logging
+import multiprocessing
+import time
+
+import symmetry
+import tablestore
+from search import Search
+from verify import verify
+
+log = logging.getLogger(__name__)
+
+# The Search instance of a worker process
+_search = None
+
+
+def _init_worker(store_path, kernel=Search):
+    global _search
+    tablestore.init_worker(store_path)
+    _search = kernel()
+
+
+def solve_one(search, facelets, maxDepth, timeOut, useSeparator):
+    """
+    Solve one cube with search and return a dict with the facelets, the solution string or the error of
+    Search.solution and the seconds it took.
+    """
+    start = time.time()
+    solution = search.solution(facelets, maxDepth, timeOut, useSeparator)
+    result = {
+        'facelets': facelets,
+        'seconds': round(time.time() - start, 4),
+    }
+    if solution.startswith('Error'):
+        result['error'] = solution
+    else:
+        result['solution'] = solution.strip()
+    return result
+
+
+def _solve_in_worker(job):
+    (facelets, maxDepth, timeOut, useSeparator) = job
+    return solve_one(_search, facelets, maxDepth, timeOut, useSeparator)
+
+
+def solve_many(facelets_list, maxDepth=21, timeOut=10, useSeparator=False, jobs=None, store_path=None, kernel=Search):
+    """
+    Generator solving every cube definition string of facelets_list on jobs worker processes (one per CPU by default),
+    yielding the results of solve_one() in input order. timeOut applies to every cube on its own.
+    """
+    # Create the store once here so the workers only have to attach it
+    tablestore.TableStore.attach(store_path)
+    pool = multiprocessing.Pool(jobs, _init_worker, (store_path, kernel))
+    try:
+        work = ((facelets, maxDepth, timeOut, useSeparator) for facelets in facelets_list)
+        for result in pool.imap(_solve_in_worker, work):
+            yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def solve_variant(search, variant, maxDepth, deadline):
+    """
+    Search the variant (rotation, inverted, facelets) of symmetry.variants() until the time.time() deadline. Returns
+    (rotation, inverted, the shortest solution found or the error code).
+    """
+    (rotation, inverted, facelets) = variant
+    timeOut = max(deadline - time.time(), 0)
+    for solution in search.solution_iter(facelets, maxDepth, timeOut, '', timeOut):
+        pass
+    return (rotation, inverted, solution)
+
+
+def _solve_variant_in_worker(job):
+    (variant, maxDepth, deadline) = job
+    return solve_variant(_search, variant, maxDepth, deadline)
+
+
+def best_variant(facelets, results):
+    """The solve_one() style result dict of the shortest variant solution in results"""
+    best = None
+    error = 'Error 8'
+    for (rotation, inverted, solution) in results:
+        if solution.startswith('Error'):
+            # Every variant is solvable if one of them is, so any other error than the timeout is the same for all
+            if solution != 'Error 8':
+                error = solution
+            continue
+        solution = symmetry.to_original(solution, rotation, inverted)
+        if not symmetry.is_solution(facelets, solution):
+            log.error('variant %d%s of %s: %s is no solution', rotation, ' inverse' if inverted else '', facelets,
+                      solution)
+            continue
+        if best is None or len(solution.split()) < len(best[0].split()):
+            best = (solution, rotation, inverted)
+
+    if best is None:
+        return {'facelets': facelets, 'error': error}
+    (solution, rotation, inverted) = best
+    return {
+        'facelets': facelets,
+        'solution': solution.strip(),
+        'variant': {'rotation': rotation, 'inverse': inverted},
+    }
+
+
+def solve_variants(facelets, maxDepth=21, timeOut=10, jobs=None, store_path=None, kernel=Search):
+    """
+    Search the cube facelets in its three axis orientations and as the inverse cube, see symmetry.py, on jobs worker
+    processes (one per variant by default). Every variant looks for shorter solutions until timeOut seconds have
+    passed. Returns a result dict like solve_one() with the shortest solution mapped back to facelets, or the error.
+    """
+    start = time.time()
+    deadline = start + timeOut
+    error = verify(facelets)
+    if error:
+        return {'facelets': facelets, 'error': 'Error %d' % abs(error), 'seconds': round(time.time() - start, 4)}
+    variants = symmetry.variants(facelets)
+
+    tablestore.TableStore.attach(store_path)
+    pool = multiprocessing.Pool(jobs or len(variants), _init_worker, (store_path, kernel))
+    try:
+        results = pool.map(_solve_variant_in_worker, [(variant, maxDepth, deadline) for variant in variants])
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+    result = best_variant(facelets, results)
+    result['seconds'] = round(time.time() - start, 4)
+    return result
+
+
+def read_facelets(f):
+    """Cube definition strings from the lines of the file f, skipping blank lines and # comments"""
+    for line in f:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line
+
+
+def write_results(results, f):
+    """Write the results as JSON lines to f, return the number of cubes that were not solved"""
+    failed = 0
+    for result in results:
+        if 'error' in result:
+            failed += 1
+        f.write(json.dumps(result, sort_keys=True) + '\n')
+        f.flush()
+    return failed
@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+
+"""
+Benchmark of the solver on a fixed corpus of cubes.
+
+benchmark_corpus.txt holds one "<category> <facelets>" per line, made once by --make-corpus from a seed and committed
+so every run solves the same cubes:
+
+    easy    scrambles of 6 to 10 moves
+    random  random cubes of tools.randomCube()
+    hard    the superflip, 20 moves from solved, and the random cubes the search needed the most nodes for
+
+A run loads the tables, solves every cube of the corpus and writes the results as JSON: the seconds the tables
+took to load, and for every category the seconds to the first solution, its length and the nodes per second. The nodes
+are counted by search.SearchStats, the counting is part of the measured time in every run alike.
+
+--repeat 3 takes the fastest of three solves of every cube, the easy cubes take milliseconds and vary a lot from run
+to run. --compare flags the numbers that got worse than in a stored run by more than the thresholds, and exits with 1
+then:
+
+./benchmark.py --kernel fast --output baseline.json
+./benchmark.py --kernel fast --compare baseline.json
+
+./benchmark.py --make-corpus --seed 1 --count 10
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os.path
+import platform
+import random
+import sys
+import time
+
+import symmetry
+import tools
+from color import color_keys
+from coordcube import CoordCube
+
+log = logging.getLogger(__name__)
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'benchmark_corpus.txt')
+CATEGORIES = ('easy', 'random', 'hard')
+KERNELS = ('search', 'fast', 'ordered')
+SOLVED = 'U' * 9 + 'R' * 9 + 'F' * 9 + 'D' * 9 + 'L' * 9 + 'B' * 9
+# Every edge flipped in place, one of the cubes furthest from solved
+SUPERFLIP = "U R2 F B R B2 R U2 L B2 R U' D' R2 F R' L B2 U2 F2"
+
+# Relative increase of the seconds and decrease of the nodes per second, and increase of the average solution length
+# in moves, that count as a regression
+TIME_THRESHOLD = 0.25
+LENGTH_THRESHOLD = 0.5
+
+
+def scramble(length):
+    """A random sequence of length moves, no two of the same face in a row"""
+    moves = []
+    face = None
+    while len(moves) < length:
+        other = random.choice(color_keys)
+        if other != face:
+            face = other
+            moves.append(face + random.choice(('', '2', "'")))
+    return ' '.join(moves)
+
+
+def make_corpus(seed, count, candidates, maxDepth=20, timeOut=10):
+    """
+    The corpus as [(category, facelets, comment)], count cubes per category. The hard cubes besides the superflip
+    are the candidates random cubes with the most nodes searched by FastSearch for a solution of maxDepth moves.
+    """
+    from fastsearch import FastSearch
+
+    random.seed(seed)
+    corpus = []
+    for i in xrange(count):
+        moves = scramble(random.randint(6, 10))
+        corpus.append(('easy', symmetry.apply_moves(SOLVED, moves), moves))
+    for i in xrange(count):
+        corpus.append(('random', tools.randomCube(), None))
+
+    search = FastSearch()
+    measured = []
+    for i in xrange(candidates):
+        facelets = tools.randomCube()
+        (solution, stats) = search.solution_stats(facelets, maxDepth, timeOut, '')
+        nodes = sum(stats.phase1Nodes) + sum(stats.phase2Nodes)
+        log.info('candidate %d: %d nodes, %s', i, nodes, solution)
+        measured.append((nodes, facelets))
+    measured.sort(reverse=True)
+    corpus.append(('hard', symmetry.apply_moves(SOLVED, SUPERFLIP), 'superflip'))
+    for (nodes, facelets) in measured[:count - 1]:
+        corpus.append(('hard', facelets, '%d nodes for %d moves' % (nodes, maxDepth)))
+    return corpus
+
+
+def write_corpus(path, corpus, header):
+    with open(path, 'w') as f:
+        for line in header:
+            f.write('# %s\n' % line)
+        for (category, facelets, comment) in corpus:
+            f.write('%-6s %s%s\n' % (category, facelets, '  # ' + comment if comment else ''))
+
+
+def read_corpus(path=CORPUS_PATH):
+    """The (category, facelets) of the corpus file at path, skipping blank lines and # comments"""
+    corpus = []
+    with open(path) as f:
+        for line in f:
+            line = line.split('#')[0].strip()
+            if line:
+                (category, facelets) = line.split()
+                corpus.append((category, facelets))
+    return corpus
+
+
+def corpus_digest(path=CORPUS_PATH):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def load_kernel(kernel, unpacked=False, phase1='auto'):
+    """Load the tables of kernel, one of KERNELS, and return (search, seconds the loading took)"""
+    start = time.time()
+    CoordCube.load_all()
+    if kernel == 'search':
+        from search import Search
+
+        search = Search()
+    else:
+        from fastsearch import FastSearch, FlatTables, OrderedSearch
+
+        FlatTables.get(unpacked, phase1)
+        search = (OrderedSearch if kernel == 'ordered' else FastSearch)(unpacked, phase1)
+    return (search, time.time() - start)
+
+
+def summarize(cubes):
+    """The totals of the results of the cubes of one category"""
+    solved = [cube for cube in cubes if 'length' in cube]
+    seconds = sum(cube['seconds'] for cube in cubes)
+    nodes = sum(cube['nodes'] for cube in cubes)
+    return {
+        'cubes': len(cubes),
+        'solved': len(solved),
+        'mean_seconds': round(seconds / len(cubes), 6),
+        'max_seconds': max(cube['seconds'] for cube in cubes),
+        'mean_length': round(float(sum(cube['length'] for cube in solved)) / len(solved), 3) if solved else None,
+        'nodes_per_second': int(nodes / seconds) if seconds else None,
+    }
+
+
+def run(corpus, search, maxDepth, timeOut, repeat=1):
+    """
+    Solve every cube of corpus with search, the seconds of a cube are the fastest of repeat solves. Returns the results
+    of the cubes and their summary per category.
+    """
+    cubes = []
+    for (category, facelets) in corpus:
+        fastest = None
+        for i in xrange(repeat):
+            start = time.time()
+            (solution, stats) = search.solution_stats(facelets, maxDepth, timeOut, '')
+            seconds = time.time() - start
+            # The nodes of the same solve as the seconds, so the nodes per second compare like with like
+            if fastest is None or seconds < fastest[0]:
+                fastest = (seconds, sum(stats.phase1Nodes) + sum(stats.phase2Nodes), solution)
+        (seconds, nodes, solution) = fastest
+        cube = {
+            'category': category,
+            'facelets': facelets,
+            'seconds': round(seconds, 6),
+            'nodes': nodes,
+        }
+        if solution.startswith('Error'):
+            cube['error'] = solution
+        else:
+            cube['length'] = len(solution.split())
+        log.info('%-6s %s %8.3fs %s', category, facelets, cube['seconds'], solution)
+        cubes.append(cube)
+
+    categories = {}
+    for category in sorted(set(cube['category'] for cube in cubes)):
+        categories[category] = summarize([cube for cube in cubes if cube['category'] == category])
+    return (cubes, categories)
+
+
+def compare(baseline, current, timeThreshold=TIME_THRESHOLD, lengthThreshold=LENGTH_THRESHOLD):
+    """
+    Compare the results current with baseline. Returns [(name, baseline value, current value, regression)] of the load
+    time and of the numbers of every category.
+    """
+    def slower(old, new):
+        return new > old * (1 + timeThreshold)
+
+    rows = [('load_seconds', baseline['load_seconds'], current['load_seconds'],
+             slower(baseline['load_seconds'], current['load_seconds']))]
+    for category in sorted(current['categories']):
+        old = baseline['categories'].get(category)
+        new = current['categories'][category]
+        if old is None:
+            continue
+        checks = (
+            ('solved', lambda a, b: b < a),
+            ('mean_seconds', slower),
+            ('max_seconds', slower),
+            ('mean_length', lambda a, b: b > a + lengthThreshold),
+            ('nodes_per_second', lambda a, b: b < a * (1 - timeThreshold)),
+        )
+        for (name, worse) in checks:
+            (a, b) = (old[name], new[name])
+            rows.append(('%s.%s' % (category, name), a, b, a is not None and b is not None and worse(a, b)))
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--kernel', choices=KERNELS, default='fast', help='Search, FastSearch or OrderedSearch')
+    parser.add_argument('--unpacked', action='store_true', help='With fast or ordered: unpacked pruning tables')
+    parser.add_argument('--phase1', choices=('auto', 'classic', 'sym'), default='auto',
+                        help='With fast or ordered: phase1 pruning tables')
+    parser.add_argument('--max-depth', type=int, help='Maximal solution length', default=21)
+    parser.add_argument('--timeout', type=float, help='Seconds allowed per cube', default=60)
+    parser.add_argument('--corpus', help='Corpus file', default=CORPUS_PATH)
+    parser.add_argument('--repeat', type=int, help='Solve every cube this often, the fastest time counts', default=1)
+    parser.add_argument('--category', nargs='+', choices=CATEGORIES, default=CATEGORIES, help='Categories to run')
+    parser.add_argument('--output', help='Write the results as JSON to this file instead of stdout', default=None)
+    parser.add_argument('--compare', help='Results of an earlier run to flag regressions against', default=None)
+    parser.add_argument('--time-threshold', type=float, default=TIME_THRESHOLD,
+                        help='Relative slowdown counted as a regression')
+    parser.add_argument('--length-threshold', type=float, default=LENGTH_THRESHOLD,
+                        help='Increase of the average solution length counted as a regression')
+    parser.add_argument('--make-corpus', action='store_true', help='Write a new corpus file instead of running it')
+    parser.add_argument('--seed', type=int, help='With --make-corpus: seed of the cubes', default=1)
+    parser.add_argument('--count', type=int, help='With --make-corpus: cubes per category', default=10)
+    parser.add_argument('--candidates', type=int, default=40,
+                        help='With --make-corpus: random cubes the hard ones are picked from')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    if args.make_corpus:
+        corpus = make_corpus(args.seed, args.count, args.candidates)
+        write_corpus(args.corpus, corpus, [
+            'Benchmark corpus of benchmark.py, "<category> <facelets>" per line',
+            './benchmark.py --make-corpus --seed %d --count %d --candidates %d' % (args.seed, args.count,
+                                                                                  args.candidates),
+        ])
+        sys.exit(0)
+
+    (search, loadSeconds) = load_kernel(args.kernel, args.unpacked, args.phase1)
+    corpus = [(category, facelets) for (category, facelets) in read_corpus(args.corpus) if category in args.category]
+    (cubes, categories) = run(corpus, search, args.max_depth, args.timeout, args.repeat)
+    results = {
+        'kernel': args.kernel,
+        'unpacked': args.unpacked,
+        'phase1': getattr(getattr(search, 'tables', None), 'phase1', 'classic'),
+        'max_depth': args.max_depth,
+        'timeout': args.timeout,
+        'repeat': args.repeat,
+        'corpus': corpus_digest(args.corpus),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'load_seconds': round(loadSeconds, 6),
+        'categories': categories,
+        'cubes': cubes,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+    else:
+        print json.dumps(results, indent=1, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for name in ('kernel', 'unpacked', 'phase1', 'max_depth', 'corpus'):
+            if baseline.get(name) != results[name]:
+                log.warning('%s differs from the baseline: %s, now %s', name, baseline.get(name), results[name])
+        rows = compare(baseline, results, args.time_threshold, args.length_threshold)
+        sys.stderr.write('%-30s %14s %14s\n' % ('', 'baseline', 'now'))
+        for (name, old, new, regression) in rows:
+            sys.stderr.write('%-30s %14s %14s%s\n' % (name, old, new, '  REGRESSION' if regression else ''))
+        sys.exit(1 if any(regression for (name, old, new, regression) in rows) else 0)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+
+"""
+Build the move and pruning tables in parallel.
+
+The tables are independent except that the pruning tables are computed from move tables, see the dependencies listed
+in coordcube.table_builders. Every table whose dependencies are finished is handed to a process pool. A finished table
+is written to prunetables/<name>.tbl right away (through a temporary file and a rename), so that file is the
+checkpoint: an interrupted build resumes with the tables that are still missing.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os.path
+import Queue
+import time
+import traceback
+
+import tables
+from coordcube import table_builders
+
+try:
+    import tablegen
+except ImportError:
+    tablegen = None
+
+log = logging.getLogger(__name__)
+
+
+def is_built(name):
+    """True if prunetables/<name>.tbl is a complete table file"""
+    path = tables.table_path(name, 'tbl')
+    if not os.path.exists(path):
+        return False
+    try:
+        tables.read_header(path)
+    except tables.TableFormatError as e:
+        log.warning('%s', e)
+        return False
+    return True
+
+
+def build_one(name, fast):
+    """
+    Worker: build table name and write it to prunetables/. Returns (name, seconds, error). The dependencies are
+    already on disk and are loaded from there.
+    """
+    try:
+        start = time.time()
+        if fast:
+            table = tablegen.build(name)
+        else:
+            table = table_builders[name][0]()
+        tables.write_table(tables.table_path(name, 'tbl'), table)
+        return (name, time.time() - start, None)
+    except Exception:
+        return (name, None, traceback.format_exc())
+
+
+def build_tables(names=None, jobs=None, force=False, fast=True):
+    """
+    Build the tables names (all of them by default) and the tables they depend on on a pool of jobs processes.
+
+    Returns {name: seconds} for every table built. Raises RuntimeError if a build failed, the tables finished until
+    then are kept.
+    """
+    fast = fast and tablegen is not None
+    builders = tablegen.fast_builders if fast else table_builders
+
+    # the requested tables and everything they depend on
+    todo = set()
+    stack = list(names or table_builders)
+    while stack:
+        name = stack.pop()
+        if name not in todo:
+            todo.add(name)
+            stack.extend(builders[name][1])
+
+    if force:
+        done = set()
+    else:
+        done = set(name for name in todo if is_built(name))
+        for name in sorted(done):
+            log.info('%s already built', name)
+
+    pending = todo - done
+    running = set()
+    times = {}
+    finished = Queue.Queue()
+    pool = multiprocessing.Pool(jobs)
+
+    try:
+        while pending or running:
+            for name in sorted(pending):
+                if all(dependency in done for dependency in builders[name][1]):
+                    log.info('building %s', name)
+                    pending.remove(name)
+                    running.add(name)
+                    pool.apply_async(build_one, (name, fast), callback=finished.put)
+
+            # A timeout keeps the wait interruptible with Ctrl-C
+            while True:
+                try:
+                    (name, seconds, error) = finished.get(timeout=1)
+                    break
+                except Queue.Empty:
+                    pass
+
+            running.remove(name)
+            if error:
+                raise RuntimeError('building %s failed:\n%s' % (name, error))
+            done.add(name)
+            times[name] = seconds
+            log.info('%s built in %.1fs', name, seconds)
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return times
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Number of worker processes, one per CPU by default')
+    parser.add_argument('--force', action='store_true', help='Rebuild tables that are already built')
+    parser.add_argument('--pure', action='store_true', help='Use the pure python builders of coordcube.py')
+    parser.add_argument('names', nargs='*', help='Tables to build, all of them by default')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    start = time.time()
+    times = build_tables(args.names, args.jobs, args.force, not args.pure)
+    log.info('%d tables built in %.1fs', len(times), time.time() - start)
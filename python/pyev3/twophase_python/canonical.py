@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+"""
+Canonical move sequences.
+
+Two moves of the same face in a row are one move, and moves of opposite faces commute: U D and D U reach the same
+cube. A move sequence is canonical if no face follows itself and opposite faces only follow each other in the order
+U D, R L, F B. Every sequence reaches the same cube as a canonical one that is at most as long, so the search only has
+to generate canonical sequences.
+
+The rule is a state machine. Its state is the axis of the last move, START before the first one, and
+transition[N_MOVE * state + move] is the state after move, or -1 if move may not follow. The search keeps the axes of
+its moves in Search.ax, so the state before the move at depth n is ax[n - 1]. Phase2 starts in the state the last
+phase1 move left, a phase2 part may not begin with a move its phase1 part may not be followed by.
+
+Count the canonical sequences of every length up to 10, of all moves and of the phase2 moves:
+
+./canonical.py --depth 10
+"""
+
+import argparse
+
+N_AXIS = 6
+N_MOVE = 18
+START = N_AXIS
+
+# U, D, R2, F2, L2 and B2
+PHASE2_MOVES = (0, 1, 2, 4, 7, 9, 10, 11, 13, 16)
+
+
+def build_transition():
+    """The transition table of the canonical sequences"""
+    table = []
+    for state in xrange(START + 1):
+        for move in xrange(N_MOVE):
+            axis = move / 3
+            if state != START and (state == axis or state - 3 == axis):
+                table.append(-1)
+            else:
+                table.append(axis)
+    return table
+
+
+transition = build_transition()
+
+# The first axis that may follow each state, where the search starts the moves of the next depth
+firstAxis = [min(move / 3 for move in xrange(N_MOVE) if transition[N_MOVE * state + move] >= 0)
+             for state in xrange(START + 1)]
+
+
+def sequences(depth, moves=range(N_MOVE)):
+    """The canonical sequences of depth moves out of moves, as lists of move indexes 3 * axis + power - 1"""
+    result = [([], START)]
+    for i in xrange(depth):
+        result = [(sequence + [move], transition[N_MOVE * state + move])
+                  for (sequence, state) in result for move in moves if transition[N_MOVE * state + move] >= 0]
+    return [sequence for (sequence, state) in result]
+
+
+def count_sequences(depth, moves=range(N_MOVE)):
+    """The number of canonical sequences of 0 to depth moves out of moves, counted per state"""
+    counts = [0] * START + [1]
+    result = [1]
+    for i in xrange(depth):
+        following = [0] * (START + 1)
+        for state in xrange(START + 1):
+            for move in moves:
+                if transition[N_MOVE * state + move] >= 0:
+                    following[transition[N_MOVE * state + move]] += counts[state]
+        counts = following
+        result.append(sum(counts))
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--depth', type=int, help='Longest sequences to count', default=10)
+    args = parser.parse_args()
+
+    phase1 = count_sequences(args.depth)
+    phase2 = count_sequences(args.depth, PHASE2_MOVES)
+    print '%5s %14s %14s %14s %14s' % ('moves', 'all', 'canonical', 'phase2 all', 'phase2 canon')
+    for depth in xrange(args.depth + 1):
+        print '%5d %14d %14d %14d %14d' % (depth, N_MOVE ** depth, phase1[depth], len(PHASE2_MOVES) ** depth,
+                                           phase2[depth])
@@ -0,0 +1,85 @@
+"""
+Client of the solver daemon, see server.py. Only uses the standard library so it is cheap to import on the EV3.
+"""
+
+import json
+import socket
+
+DEFAULT_PORT = 8484
+
+
+class SolverError(Exception):
+    pass
+
+
+def parse_address(address):
+    """
+    'host:port' or 'host' for TCP, a path containing a / for a unix socket.
+    Returns (family, address) for socket.socket and socket.connect.
+    """
+    if '/' in address:
+        return (socket.AF_UNIX, address)
+    if ':' in address:
+        (host, port) = address.rsplit(':', 1)
+        return (socket.AF_INET, (host, int(port)))
+    return (socket.AF_INET, (address, DEFAULT_PORT))
+
+
+class SolverClient(object):
+    """Connection to a solver daemon. Requests are sent as one JSON object per line, answered the same way."""
+
+    def __init__(self, address, connect_timeout=5):
+        (self.family, self.address) = parse_address(address)
+        self.connect_timeout = connect_timeout
+        self.sock = None
+        self.f = None
+
+    def connect(self):
+        self.sock = socket.socket(self.family, socket.SOCK_STREAM)
+        self.sock.settimeout(self.connect_timeout)
+        self.sock.connect(self.address)
+        self.f = self.sock.makefile('rb')
+
+    def close(self):
+        if self.sock:
+            self.f.close()
+            self.sock.close()
+            self.sock = None
+            self.f = None
+
+    def request(self, request, timeout):
+        """Send the dict request and return the response dict, waiting at most timeout seconds for it"""
+        if not self.sock:
+            self.connect()
+        try:
+            self.sock.settimeout(timeout)
+            self.sock.sendall(json.dumps(request) + '\n')
+            line = self.f.readline()
+        except (socket.error, socket.timeout):
+            self.close()
+            raise
+        if not line:
+            self.close()
+            raise SolverError('connection closed by %s' % (self.address,))
+        return json.loads(line)
+
+    def ping(self, timeout=5):
+        return self.request({'cmd': 'ping'}, timeout).get('ok', False)
+
+    def solve(self, facelets, maxDepth=21, timeOut=10, improveTimeOut=None, robotState=None):
+        """
+        Return the solution of the cube definition string facelets, moves separated by spaces.
+        With improveTimeOut the daemon returns the shortest solution it found within that many seconds. With
+        robotState, the Rubiks.state of the robot, it returns the one the robot executes fastest instead.
+        Raises SolverError with the Search.solution error code if there is no solution, socket.error if the daemon
+        cannot be reached.
+        """
+        request = {'facelets': facelets, 'max_depth': maxDepth, 'timeout': timeOut}
+        if improveTimeOut is not None:
+            request['improve_timeout'] = improveTimeOut
+        if robotState is not None:
+            request['robot_state'] = ''.join(robotState)
+        response = self.request(request, timeOut + self.connect_timeout)
+        if 'error' in response:
+            raise SolverError(response['error'])
+        return response['solution']
@@ -1,6 +1,9 @@
 import logging
 import os.path
 import cPickle
+import time
+
+import tables
 
 from cubiecube import CubieCube, moveCube, getURtoDF
 
@@ -30,18 +33,82 @@ def getPruning(table, index):
     return res
     # return table[index] & 0xf
 
+_LOW_NIBBLES = ''.join(chr(i & 0x0f) for i in xrange(256))
+_HIGH_NIBBLES = ''.join(chr(i >> 4) for i in xrange(256))
+
+def unpackPruning(table):
+    """
+    Return the pruning table with one value per byte, a bytearray with unpacked[index] == getPruning(table, index).
+    Uses twice the memory but saves the nibble extraction on every lookup.
+    """
+    packed = str(bytearray(table))
+    unpacked = bytearray(2 * len(packed))
+    unpacked[0::2] = packed.translate(_LOW_NIBBLES)
+    unpacked[1::2] = packed.translate(_HIGH_NIBBLES)
+    return unpacked
+
+# Formats tried by load_cachetable, in order. 'tbl' is the memory-mapped binary format of tables.py, 'pkl' the
+# original pickles.
+table_formats = ('tbl', 'pkl')
+
 def load_cachetable(name):
-    obj = None
-    try:
-        with open(os.path.join(cache_dir, name + '.pkl')) as f:
-            obj = cPickle.load(f)
-    except IOError as e:
-        log.warning('could not read cache for %s: %s. Recalculating it...', name, e)
-    return obj
+    return find_cachetable(name)[0]
+
+def find_cachetable(name):
+    """Return (table, format) of the first readable cache file for name, (None, None) if there is none"""
+    for ext in table_formats:
+        path = os.path.join(cache_dir, name + '.' + ext)
+        if not os.path.exists(path):
+            continue
+        try:
+            if ext == 'tbl':
+                return (tables.read_table(path), ext)
+            with open(path) as f:
+                return (cPickle.load(f), ext)
+        except (IOError, tables.TableFormatError) as e:
+            log.warning('could not read %s: %s', path, e)
+    log.warning('could not read cache for %s. Recalculating it...', name)
+    return (None, None)
 
 def dump_cachetable(obj, name):
-    with open(os.path.join(cache_dir, name + '.pkl'), 'w') as f:
-        cPickle.dump(obj, f)
+    if 'tbl' in table_formats:
+        tables.write_table(os.path.join(cache_dir, name + '.tbl'), obj)
+    else:
+        with open(os.path.join(cache_dir, name + '.pkl'), 'w') as f:
+            cPickle.dump(obj, f)
+
+
+class LazyTable(object):
+    """
+    Class attribute of CoordCube that loads or builds its table on first access.
+
+    The loaded table replaces the descriptor on the class, so later lookups are plain attribute lookups and cost
+    nothing extra in the search. The time spent is recorded in CoordCube.load_times.
+    """
+
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+
+    def __get__(self, obj, owner):
+        (build, dependencies) = table_builders[self.name]
+        log.info('Preparing %s', self.description)
+
+        start = time.time()
+        (table, source) = find_cachetable(self.name)
+        if table is None:
+            # Load what the builder reads first so its time is not counted here
+            for dependency in dependencies:
+                getattr(CoordCube, dependency)
+            start = time.time()
+            table = build()
+            dump_cachetable(table, self.name)
+            source = 'built'
+
+        CoordCube.load_times[self.name] = (time.time() - start, source)
+        log.info('%s ready (%s) in %.3fs', self.name, source, CoordCube.load_times[self.name][0])
+        setattr(CoordCube, self.name, table)
+        return table
 
 
 class CoordCube(object):
@@ -63,6 +130,9 @@ class CoordCube(object):
 
     N_MOVE = 18
 
+    # table name -> (seconds spent, 'tbl', 'pkl' or 'built') for every table loaded so far
+    load_times = {}
+
     # All coordinates are 0 for a solved cube except for UBtoDF, which is 114
     # short twist
     # short flip
@@ -107,45 +177,33 @@ class CoordCube(object):
             # are not in UD-slice
             self.URtoDF = self.MergeURtoULandUBtoDF[self.URtoUL][self.UBtoDF]
 
+    @classmethod
+    def is_loaded(cls, name):
+        return not isinstance(CoordCube.__dict__[name], LazyTable)
+
+    @classmethod
+    def load_all(cls):
+        """Load every table now instead of on first use"""
+        for name in table_builders:
+            getattr(CoordCube, name)
+
+    @classmethod
+    def load_report(cls):
+        """Return a printable summary of CoordCube.load_times"""
+        lines = []
+        for name in sorted(cls.load_times, key=lambda name: -cls.load_times[name][0]):
+            (seconds, source) = cls.load_times[name]
+            lines.append('%-28s %-5s %8.3fs' % (name, source, seconds))
+        lines.append('%-34s %8.3fs' % ('total', sum(seconds for (seconds, source) in cls.load_times.values())))
+        return '\n'.join(lines)
+
     # ******************************************Phase 1 move tables*****************************************************
 
-    log.info('Preparing move table for the twists of the corners...')
     # Move table for the twists of the corners
-    # twist < 2187 in phase 2.
-    # twist = 0 in phase 2.
-    twistMove = load_cachetable('twistMove')
-    if not twistMove:
-        twistMove = [[0] * N_MOVE for i in xrange(N_TWIST)]   # new short[N_TWIST][N_MOVE]
-        a = CubieCube()
-        for i in xrange(N_TWIST):
-            a.setTwist(i)
-            for j in xrange(6):
-                for k in xrange(3):
-                    a.cornerMultiply(moveCube[j])
-                    twistMove[i][3 * j + k] = a.getTwist()
-                a.cornerMultiply(moveCube[j])   # 4. faceturn restores
-                # a
-        dump_cachetable(twistMove, 'twistMove')
+    twistMove = LazyTable('twistMove', 'move table for the twists of the corners')
 
-    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
     # Move table for the flips of the edges
-    # flip < 2048 in phase 1
-    # flip = 0 in phase 2.
-    log.info('Preparing move table for the flips of the edges')
-
-    flipMove = load_cachetable('flipMove')
-    if not flipMove:
-        flipMove = [[0] * N_MOVE for i in xrange(N_FLIP)]     # new short[N_FLIP][N_MOVE]
-        a = CubieCube()
-        for i in xrange(N_FLIP):
-            a.setFlip(i)
-            for j in xrange(6):
-                for k in xrange(3):
-                    a.edgeMultiply(moveCube[j])
-                    flipMove[i][3 * j + k] = a.getFlip()
-                a.edgeMultiply(moveCube[j])
-                # a
-        dump_cachetable(flipMove, 'flipMove')
+    flipMove = LazyTable('flipMove', 'move table for the flips of the edges')
 
     # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
     # Parity of the corner permutation. This is the same as the parity for the edge permutation of a valid cube.
@@ -156,232 +214,335 @@ class CoordCube(object):
     ]
 
     # ***********************************Phase 1 and 2 movetable********************************************************
-    log.info('Preparing move table for the four UD-slice edges FR, FL, Bl and BR')
-    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+    FRtoBR_Move = LazyTable('FRtoBR_Move', 'move table for the four UD-slice edges FR, FL, Bl and BR')
+    URFtoDLF_Move = LazyTable(
+        'URFtoDLF_Move',
+        'move table for permutation of six corners. The positions of the DBL and DRB corners are determined by the '
+        'parity.')
+    URtoDF_Move = LazyTable(
+        'URtoDF_Move',
+        'move table for the permutation of six U-face and D-face edges in phase2. The positions of the DL and DB edges '
+        'are determined by the parity.')
+
+    # **************************helper move tables to compute URtoDF for the beginning of phase2************************
+    URtoUL_Move = LazyTable('URtoUL_Move', 'move table for the three edges UR,UF and UL in phase1.')
+    UBtoDF_Move = LazyTable('UBtoDF_Move', 'move table for the three edges UB,DR and DF in phase1.')
+    MergeURtoULandUBtoDF = LazyTable(
+        'MergeURtoULandUBtoDF',
+        'table to merge the coordinates of the UR,UF,UL and UB,DR,DF edges at the beginning of phase2')
+
+    # ****************************************Pruning tables for the search*********************************************
+    Slice_URFtoDLF_Parity_Prun = LazyTable(
+        'Slice_URFtoDLF_Parity_Prun',
+        'pruning table for the permutation of the corners and the UD-slice edges in phase2.')
+    Slice_URtoDF_Parity_Prun = LazyTable(
+        'Slice_URtoDF_Parity_Prun', 'pruning table for the permutation of the edges in phase2.')
+    Slice_Twist_Prun = LazyTable(
+        'Slice_Twist_Prun',
+        'pruning table for the twist of the corners and the position (not permutation) of the UD-slice edges in phase1')
+    Slice_Flip_Prun = LazyTable(
+        'Slice_Flip_Prun',
+        'pruning table for the flip of the edges and the position (not permutation) of the UD-slice edges in phase1')
+
+
+# ******************************************Phase 1 move tables*****************************************************
+
+def build_twistMove():
+    # Move table for the twists of the corners
+    # twist < 2187 in phase 2.
+    # twist = 0 in phase 2.
+    twistMove = [[0] * CoordCube.N_MOVE for i in xrange(CoordCube.N_TWIST)]   # new short[N_TWIST][N_MOVE]
+    a = CubieCube()
+    for i in xrange(CoordCube.N_TWIST):
+        a.setTwist(i)
+        for j in xrange(6):
+            for k in xrange(3):
+                a.cornerMultiply(moveCube[j])
+                twistMove[i][3 * j + k] = a.getTwist()
+            a.cornerMultiply(moveCube[j])   # 4. faceturn restores
+            # a
+    return twistMove
+
+
+def build_flipMove():
+    # Move table for the flips of the edges
+    # flip < 2048 in phase 1
+    # flip = 0 in phase 2.
+    flipMove = [[0] * CoordCube.N_MOVE for i in xrange(CoordCube.N_FLIP)]     # new short[N_FLIP][N_MOVE]
+    a = CubieCube()
+    for i in xrange(CoordCube.N_FLIP):
+        a.setFlip(i)
+        for j in xrange(6):
+            for k in xrange(3):
+                a.edgeMultiply(moveCube[j])
+                flipMove[i][3 * j + k] = a.getFlip()
+            a.edgeMultiply(moveCube[j])
+            # a
+    return flipMove
+
+
+# ***********************************Phase 1 and 2 movetable********************************************************
+
+def build_FRtoBR_Move():
     # Move table for the four UD-slice edges FR, FL, Bl and BR
     # FRtoBRMove < 11880 in phase 1
     # FRtoBRMove < 24 in phase 2
     # FRtoBRMove = 0 for solved cube
-
-    FRtoBR_Move = load_cachetable('FRtoBR_Move')
-    if not FRtoBR_Move:
-        FRtoBR_Move = [[0] * N_MOVE for i in xrange(N_FRtoBR)]    # new short[N_FRtoBR][N_MOVE]
-        a = CubieCube()
-        for i in xrange(N_FRtoBR):
-            a.setFRtoBR(i)
-            for j in xrange(6):
-                for k in xrange(3):
-                    a.edgeMultiply(moveCube[j])
-                    FRtoBR_Move[i][3 * j + k] = a.getFRtoBR()
+    FRtoBR_Move = [[0] * CoordCube.N_MOVE for i in xrange(CoordCube.N_FRtoBR)]    # new short[N_FRtoBR][N_MOVE]
+    a = CubieCube()
+    for i in xrange(CoordCube.N_FRtoBR):
+        a.setFRtoBR(i)
+        for j in xrange(6):
+            for k in xrange(3):
                 a.edgeMultiply(moveCube[j])
-        dump_cachetable(FRtoBR_Move, 'FRtoBR_Move')
+                FRtoBR_Move[i][3 * j + k] = a.getFRtoBR()
+            a.edgeMultiply(moveCube[j])
+    return FRtoBR_Move
 
-    # *******************************************Phase 1 and 2 movetable************************************************
 
-    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+# *******************************************Phase 1 and 2 movetable************************************************
+
+def build_URFtoDLF_Move():
     # Move table for permutation of six corners. The positions of the DBL and DRB corners are determined by the parity.
     # URFtoDLF < 20160 in phase 1
     # URFtoDLF < 20160 in phase 2
     # URFtoDLF = 0 for solved cube.
-    log.info('Preparing move table for permutation of six corners. The positions of the DBL and DRB corners are determined by the parity.')
-    URFtoDLF_Move = load_cachetable('URFtoDLF_Move')
-    if not URFtoDLF_Move:
-        URFtoDLF_Move = [[0] * N_MOVE for i in xrange(N_URFtoDLF)]    # new short[N_URFtoDLF][N_MOVE]
-        a = CubieCube()
-        for i in xrange(N_URFtoDLF):
-            a.setURFtoDLF(i)
-            for j in xrange(6):
-                for k in xrange(3):
-                    a.cornerMultiply(moveCube[j])
-                    URFtoDLF_Move[i][3 * j + k] = a.getURFtoDLF()
+    URFtoDLF_Move = [[0] * CoordCube.N_MOVE for i in xrange(CoordCube.N_URFtoDLF)]    # new short[N_URFtoDLF][N_MOVE]
+    a = CubieCube()
+    for i in xrange(CoordCube.N_URFtoDLF):
+        a.setURFtoDLF(i)
+        for j in xrange(6):
+            for k in xrange(3):
                 a.cornerMultiply(moveCube[j])
-        dump_cachetable(URFtoDLF_Move, 'URFtoDLF_Move')
+                URFtoDLF_Move[i][3 * j + k] = a.getURFtoDLF()
+            a.cornerMultiply(moveCube[j])
+    return URFtoDLF_Move
 
-    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+
+def build_URtoDF_Move():
     # Move table for the permutation of six U-face and D-face edges in phase2. The positions of the DL and DB edges are
     # determined by the parity.
     # URtoDF < 665280 in phase 1
     # URtoDF < 20160 in phase 2
     # URtoDF = 0 for solved cube.
-    log.info('Preparing move table for the permutation of six U-face and D-face edges in phase2. The positions of the DL and DB edges are')
-    URtoDF_Move = load_cachetable('URtoDF_Move')
-    if not URtoDF_Move:
-        URtoDF_Move = [[0] * N_MOVE for i in xrange(N_URtoDF)]    # new short[N_URtoDF][N_MOVE]
-        a = CubieCube()
-        for i in xrange(N_URtoDF):
-            a.setURtoDF(i)
-            for j in xrange(6):
-                for k in xrange(3):
-                    a.edgeMultiply(moveCube[j])
-                    URtoDF_Move[i][3 * j + k] = a.getURtoDF()
-                    # Table values are only valid for phase 2 moves!
-                    # For phase 1 moves, casting to short is not possible.
+    URtoDF_Move = [[0] * CoordCube.N_MOVE for i in xrange(CoordCube.N_URtoDF)]    # new short[N_URtoDF][N_MOVE]
+    a = CubieCube()
+    for i in xrange(CoordCube.N_URtoDF):
+        a.setURtoDF(i)
+        for j in xrange(6):
+            for k in xrange(3):
                 a.edgeMultiply(moveCube[j])
-        dump_cachetable(URtoDF_Move, 'URtoDF_Move')
+                URtoDF_Move[i][3 * j + k] = a.getURtoDF()
+                # Table values are only valid for phase 2 moves!
+                # For phase 1 moves, casting to short is not possible.
+            a.edgeMultiply(moveCube[j])
+    return URtoDF_Move
 
-    # **************************helper move tables to compute URtoDF for the beginning of phase2************************
-    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+
+# **************************helper move tables to compute URtoDF for the beginning of phase2************************
+
+def build_URtoUL_Move():
     # Move table for the three edges UR,UF and UL in phase1.
-    log.info('Preparing move table for the three edges UR,UF and UL in phase1.')
-    URtoUL_Move = load_cachetable('URtoUL_Move')
-    if not URtoUL_Move:
-        URtoUL_Move = [[0] * N_MOVE for i in xrange(N_URtoUL)]    # new short[N_URtoUL][N_MOVE]
-        a = CubieCube()
-        for i in xrange(N_URtoUL):
-            a.setURtoUL(i)
-            for j in xrange(6):
-                for k in xrange(3):
-                    a.edgeMultiply(moveCube[j])
-                    URtoUL_Move[i][3 * j + k] = a.getURtoUL()
+    URtoUL_Move = [[0] * CoordCube.N_MOVE for i in xrange(CoordCube.N_URtoUL)]    # new short[N_URtoUL][N_MOVE]
+    a = CubieCube()
+    for i in xrange(CoordCube.N_URtoUL):
+        a.setURtoUL(i)
+        for j in xrange(6):
+            for k in xrange(3):
                 a.edgeMultiply(moveCube[j])
-        dump_cachetable(URtoUL_Move, 'URtoUL_Move')
+                URtoUL_Move[i][3 * j + k] = a.getURtoUL()
+            a.edgeMultiply(moveCube[j])
+    return URtoUL_Move
 
-    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+
+def build_UBtoDF_Move():
     # Move table for the three edges UB,DR and DF in phase1.
-    log.info('Preparing move table for the three edges UB,DR and DF in phase1.')
-    UBtoDF_Move = load_cachetable('UBtoDF_Move')
-    if not UBtoDF_Move:
-        UBtoDF_Move = [[0] * N_MOVE for i in xrange(N_UBtoDF)]    # new short[N_UBtoDF][N_MOVE]
-        a = CubieCube()
-        for i in xrange(N_UBtoDF):
-            a.setUBtoDF(i)
-            for j in xrange(6):
-                for k in xrange(3):
-                    a.edgeMultiply(moveCube[j])
-                    UBtoDF_Move[i][3 * j + k] = a.getUBtoDF()
+    UBtoDF_Move = [[0] * CoordCube.N_MOVE for i in xrange(CoordCube.N_UBtoDF)]    # new short[N_UBtoDF][N_MOVE]
+    a = CubieCube()
+    for i in xrange(CoordCube.N_UBtoDF):
+        a.setUBtoDF(i)
+        for j in xrange(6):
+            for k in xrange(3):
                 a.edgeMultiply(moveCube[j])
-        dump_cachetable(UBtoDF_Move, 'UBtoDF_Move')
+                UBtoDF_Move[i][3 * j + k] = a.getUBtoDF()
+            a.edgeMultiply(moveCube[j])
+    return UBtoDF_Move
 
-    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+
+def build_MergeURtoULandUBtoDF():
     # Table to merge the coordinates of the UR,UF,UL and UB,DR,DF edges at the beginning of phase2
-    log.info('Preparing table to merge the coordinates of the UR,UF,UL and UB,DR,DF edges at the beginning of phase2')
-    MergeURtoULandUBtoDF = load_cachetable('MergeURtoULandUBtoDF')
-    if not MergeURtoULandUBtoDF:
-        MergeURtoULandUBtoDF = [[0] * 336 for i in xrange(336)]   # new short[336][336]
-        # for i, j <336 the six edges UR,UF,UL,UB,DR,DF are not in the
-        # UD-slice and the index is <20160
-        for uRtoUL in xrange(336):
-            for uBtoDF in xrange(336):
-                MergeURtoULandUBtoDF[uRtoUL][uBtoDF] = getURtoDF(uRtoUL, uBtoDF)
-        dump_cachetable(MergeURtoULandUBtoDF, 'MergeURtoULandUBtoDF')
+    MergeURtoULandUBtoDF = [[0] * 336 for i in xrange(336)]   # new short[336][336]
+    # for i, j <336 the six edges UR,UF,UL,UB,DR,DF are not in the
+    # UD-slice and the index is <20160
+    for uRtoUL in xrange(336):
+        for uBtoDF in xrange(336):
+            MergeURtoULandUBtoDF[uRtoUL][uBtoDF] = getURtoDF(uRtoUL, uBtoDF)
+    return MergeURtoULandUBtoDF
 
-    # ****************************************Pruning tables for the search*********************************************
-    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+
+# ****************************************Pruning tables for the search*********************************************
+
+def build_Slice_URFtoDLF_Parity_Prun():
     # Pruning table for the permutation of the corners and the UD-slice edges in phase2.
     # The pruning table entries give a lower estimation for the number of moves to reach the solved cube.
-    log.info('Preparing pruning table for the permutation of the corners and the UD-slice edges in phase2.')
-    Slice_URFtoDLF_Parity_Prun = load_cachetable('Slice_URFtoDLF_Parity_Prun')
-    if not Slice_URFtoDLF_Parity_Prun:
-        Slice_URFtoDLF_Parity_Prun = [-1] * (N_SLICE2 * N_URFtoDLF * N_PARITY / 2)     # new byte[N_SLICE2 * N_URFtoDLF * N_PARITY / 2]
-        # Slice_URFtoDLF_Parity_Prun = [-1] * (N_SLICE2 * N_URFtoDLF * N_PARITY)
-        depth = 0
-        setPruning(Slice_URFtoDLF_Parity_Prun, 0, 0)
-        done = 1
-        while (done != N_SLICE2 * N_URFtoDLF * N_PARITY):
-            for i in xrange(N_SLICE2 * N_URFtoDLF * N_PARITY):
-                parity = i % 2
-                URFtoDLF = (i / 2) / N_SLICE2
-                _slice = (i / 2) % N_SLICE2
-                if getPruning(Slice_URFtoDLF_Parity_Prun, i) == depth:
-                    for j in xrange(18):
-                        if j in (3, 5, 6, 8, 12, 14, 15, 17):
-                            continue
-                        else:
-                            newSlice = FRtoBR_Move[_slice][j]
-                            newURFtoDLF = URFtoDLF_Move[URFtoDLF][j]
-                            newParity = parityMove[parity][j]
-                            if (getPruning(Slice_URFtoDLF_Parity_Prun, (N_SLICE2 * newURFtoDLF + newSlice) * 2 + newParity) == 0x0f):
-                                setPruning(
-                                    Slice_URFtoDLF_Parity_Prun,
-                                    (N_SLICE2 * newURFtoDLF + newSlice) * 2 + newParity,
-                                    (depth + 1) & 0xff
-                                )
-                                done += 1
-
-            depth += 1
-        dump_cachetable(Slice_URFtoDLF_Parity_Prun, 'Slice_URFtoDLF_Parity_Prun')
+    N_SLICE2 = CoordCube.N_SLICE2
+    N_URFtoDLF = CoordCube.N_URFtoDLF
+    N_PARITY = CoordCube.N_PARITY
+    FRtoBR_Move = CoordCube.FRtoBR_Move
+    URFtoDLF_Move = CoordCube.URFtoDLF_Move
+    parityMove = CoordCube.parityMove
+
+    Slice_URFtoDLF_Parity_Prun = [-1] * (N_SLICE2 * N_URFtoDLF * N_PARITY / 2)     # new byte[N_SLICE2 * N_URFtoDLF * N_PARITY / 2]
+    # Slice_URFtoDLF_Parity_Prun = [-1] * (N_SLICE2 * N_URFtoDLF * N_PARITY)
+    depth = 0
+    setPruning(Slice_URFtoDLF_Parity_Prun, 0, 0)
+    done = 1
+    while (done != N_SLICE2 * N_URFtoDLF * N_PARITY):
+        for i in xrange(N_SLICE2 * N_URFtoDLF * N_PARITY):
+            parity = i % 2
+            URFtoDLF = (i / 2) / N_SLICE2
+            _slice = (i / 2) % N_SLICE2
+            if getPruning(Slice_URFtoDLF_Parity_Prun, i) == depth:
+                for j in xrange(18):
+                    if j in (3, 5, 6, 8, 12, 14, 15, 17):
+                        continue
+                    else:
+                        newSlice = FRtoBR_Move[_slice][j]
+                        newURFtoDLF = URFtoDLF_Move[URFtoDLF][j]
+                        newParity = parityMove[parity][j]
+                        if (getPruning(Slice_URFtoDLF_Parity_Prun, (N_SLICE2 * newURFtoDLF + newSlice) * 2 + newParity) == 0x0f):
+                            setPruning(
+                                Slice_URFtoDLF_Parity_Prun,
+                                (N_SLICE2 * newURFtoDLF + newSlice) * 2 + newParity,
+                                (depth + 1) & 0xff
+                            )
+                            done += 1
 
-    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+        depth += 1
+    return Slice_URFtoDLF_Parity_Prun
+
+
+def build_Slice_URtoDF_Parity_Prun():
     # Pruning table for the permutation of the edges in phase2.
     # The pruning table entries give a lower estimation for the number of moves to reach the solved cube.
-    log.info('Preparing pruning table for the permutation of the edges in phase2.')
-    Slice_URtoDF_Parity_Prun = load_cachetable('Slice_URtoDF_Parity_Prun')
-    if not Slice_URtoDF_Parity_Prun:
-        Slice_URtoDF_Parity_Prun = [-1] * (N_SLICE2 * N_URtoDF * N_PARITY / 2)  # new byte[N_SLICE2 * N_URtoDF * N_PARITY / 2]
-        # Slice_URtoDF_Parity_Prun = [-1] * (N_SLICE2 * N_URtoDF * N_PARITY)  # new byte[N_SLICE2 * N_URtoDF * N_PARITY / 2]
-        depth = 0
-        setPruning(Slice_URtoDF_Parity_Prun, 0, 0)
-        done = 1
-        while (done != N_SLICE2 * N_URtoDF * N_PARITY):
-            for i in xrange(N_SLICE2 * N_URtoDF * N_PARITY):
-                parity = i % 2
-                URtoDF = (i / 2) / N_SLICE2
-                _slice = (i / 2) % N_SLICE2
-                if (getPruning(Slice_URtoDF_Parity_Prun, i) == depth):
-                    for j in xrange(18):
-                        if j in (3, 5, 6, 8, 12, 14, 15, 17):
-                            continue
-                        else:
-                            newSlice = FRtoBR_Move[_slice][j]
-                            newURtoDF = URtoDF_Move[URtoDF][j]
-                            newParity = parityMove[parity][j]
-                            if (getPruning(Slice_URtoDF_Parity_Prun, (N_SLICE2 * newURtoDF + newSlice) * 2 + newParity) == 0x0f):
-                                setPruning(
-                                    Slice_URtoDF_Parity_Prun,
-                                    (N_SLICE2 * newURtoDF + newSlice) * 2 + newParity,
-                                    (depth + 1) & 0xff
-                                )
-                                done += 1
-            depth += 1
-        dump_cachetable(Slice_URtoDF_Parity_Prun, 'Slice_URtoDF_Parity_Prun')
-
-    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-    # Pruning table for the twist of the corners and the position (not permutation) of the UD-slice edges in phase1
-    # The pruning table entries give a lower estimation for the number of moves to reach the H-subgroup.
-    log.info('Pruning table for the twist of the corners and the position (not permutation) of the UD-slice edges in phase1')
-    Slice_Twist_Prun = load_cachetable('Slice_Twist_Prun')
-    if not Slice_Twist_Prun:
-        Slice_Twist_Prun = [-1] * (N_SLICE1 * N_TWIST / 2 + 1)  # new byte[N_SLICE1 * N_TWIST / 2 + 1]
-        # Slice_Twist_Prun = [-1] * (N_SLICE1 * N_TWIST + 1)  # new byte[N_SLICE1 * N_TWIST / 2 + 1]
-        depth = 0
-        setPruning(Slice_Twist_Prun, 0, 0)
-        done = 1
-        while (done != N_SLICE1 * N_TWIST):
-            for i in xrange(N_SLICE1 * N_TWIST):
-                twist = i / N_SLICE1
-                _slice = i % N_SLICE1
-                if (getPruning(Slice_Twist_Prun, i) == depth):
-                    for j in xrange(18):
-                        newSlice = FRtoBR_Move[_slice * 24][j] / 24
-                        newTwist = twistMove[twist][j]
-                        if (getPruning(Slice_Twist_Prun, N_SLICE1 * newTwist + newSlice) == 0x0f):
-                            setPruning(Slice_Twist_Prun, N_SLICE1 * newTwist + newSlice, (depth + 1) & 0xff)
+    N_SLICE2 = CoordCube.N_SLICE2
+    N_URtoDF = CoordCube.N_URtoDF
+    N_PARITY = CoordCube.N_PARITY
+    FRtoBR_Move = CoordCube.FRtoBR_Move
+    URtoDF_Move = CoordCube.URtoDF_Move
+    parityMove = CoordCube.parityMove
+
+    Slice_URtoDF_Parity_Prun = [-1] * (N_SLICE2 * N_URtoDF * N_PARITY / 2)  # new byte[N_SLICE2 * N_URtoDF * N_PARITY / 2]
+    # Slice_URtoDF_Parity_Prun = [-1] * (N_SLICE2 * N_URtoDF * N_PARITY)  # new byte[N_SLICE2 * N_URtoDF * N_PARITY / 2]
+    depth = 0
+    setPruning(Slice_URtoDF_Parity_Prun, 0, 0)
+    done = 1
+    while (done != N_SLICE2 * N_URtoDF * N_PARITY):
+        for i in xrange(N_SLICE2 * N_URtoDF * N_PARITY):
+            parity = i % 2
+            URtoDF = (i / 2) / N_SLICE2
+            _slice = (i / 2) % N_SLICE2
+            if (getPruning(Slice_URtoDF_Parity_Prun, i) == depth):
+                for j in xrange(18):
+                    if j in (3, 5, 6, 8, 12, 14, 15, 17):
+                        continue
+                    else:
+                        newSlice = FRtoBR_Move[_slice][j]
+                        newURtoDF = URtoDF_Move[URtoDF][j]
+                        newParity = parityMove[parity][j]
+                        if (getPruning(Slice_URtoDF_Parity_Prun, (N_SLICE2 * newURtoDF + newSlice) * 2 + newParity) == 0x0f):
+                            setPruning(
+                                Slice_URtoDF_Parity_Prun,
+                                (N_SLICE2 * newURtoDF + newSlice) * 2 + newParity,
+                                (depth + 1) & 0xff
+                            )
                             done += 1
+        depth += 1
+    return Slice_URtoDF_Parity_Prun
 
-            depth += 1
-        dump_cachetable(Slice_Twist_Prun, 'Slice_Twist_Prun')
 
-    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+def build_Slice_Twist_Prun():
+    # Pruning table for the twist of the corners and the position (not permutation) of the UD-slice edges in phase1
+    # The pruning table entries give a lower estimation for the number of moves to reach the H-subgroup.
+    N_SLICE1 = CoordCube.N_SLICE1
+    N_TWIST = CoordCube.N_TWIST
+    FRtoBR_Move = CoordCube.FRtoBR_Move
+    twistMove = CoordCube.twistMove
+
+    Slice_Twist_Prun = [-1] * (N_SLICE1 * N_TWIST / 2 + 1)  # new byte[N_SLICE1 * N_TWIST / 2 + 1]
+    # Slice_Twist_Prun = [-1] * (N_SLICE1 * N_TWIST + 1)  # new byte[N_SLICE1 * N_TWIST / 2 + 1]
+    depth = 0
+    setPruning(Slice_Twist_Prun, 0, 0)
+    done = 1
+    while (done != N_SLICE1 * N_TWIST):
+        for i in xrange(N_SLICE1 * N_TWIST):
+            twist = i / N_SLICE1
+            _slice = i % N_SLICE1
+            if (getPruning(Slice_Twist_Prun, i) == depth):
+                for j in xrange(18):
+                    newSlice = FRtoBR_Move[_slice * 24][j] / 24
+                    newTwist = twistMove[twist][j]
+                    if (getPruning(Slice_Twist_Prun, N_SLICE1 * newTwist + newSlice) == 0x0f):
+                        setPruning(Slice_Twist_Prun, N_SLICE1 * newTwist + newSlice, (depth + 1) & 0xff)
+                        done += 1
+
+        depth += 1
+    return Slice_Twist_Prun
+
+
+def build_Slice_Flip_Prun():
     # Pruning table for the flip of the edges and the position (not permutation) of the UD-slice edges in phase1
     # The pruning table entries give a lower estimation for the number of moves to reach the H-subgroup.
-    log.info('Pruning table for the flip of the edges and the position (not permutation) of the UD-slice edges in phase1')
-    Slice_Flip_Prun = load_cachetable('Slice_Flip_Prun')
-    if not Slice_Flip_Prun:
-        Slice_Flip_Prun = [-1] * (N_SLICE1 * N_FLIP / 2)    # new byte[N_SLICE1 * N_FLIP / 2]
-        # Slice_Flip_Prun = [-1] * (N_SLICE1 * N_FLIP)    # new byte[N_SLICE1 * N_FLIP / 2]
-        depth = 0
-        setPruning(Slice_Flip_Prun, 0, 0)
-        done = 1
-        while (done != N_SLICE1 * N_FLIP):
-            for i in xrange(N_SLICE1 * N_FLIP):
-                flip = i / N_SLICE1
-                _slice = i % N_SLICE1
-                if (getPruning(Slice_Flip_Prun, i) == depth):
-                    for j in xrange(18):
-                        newSlice = FRtoBR_Move[_slice * 24][j] / 24
-                        newFlip = flipMove[flip][j]
-                        if (getPruning(Slice_Flip_Prun, N_SLICE1 * newFlip + newSlice) == 0x0f):
-                            setPruning(Slice_Flip_Prun, N_SLICE1 * newFlip + newSlice, (depth + 1) & 0xff)
-                            done += 1
-            depth += 1
-        dump_cachetable(Slice_Flip_Prun, 'Slice_Flip_Prun')
+    N_SLICE1 = CoordCube.N_SLICE1
+    N_FLIP = CoordCube.N_FLIP
+    FRtoBR_Move = CoordCube.FRtoBR_Move
+    flipMove = CoordCube.flipMove
+
+    Slice_Flip_Prun = [-1] * (N_SLICE1 * N_FLIP / 2)    # new byte[N_SLICE1 * N_FLIP / 2]
+    # Slice_Flip_Prun = [-1] * (N_SLICE1 * N_FLIP)    # new byte[N_SLICE1 * N_FLIP / 2]
+    depth = 0
+    setPruning(Slice_Flip_Prun, 0, 0)
+    done = 1
+    while (done != N_SLICE1 * N_FLIP):
+        for i in xrange(N_SLICE1 * N_FLIP):
+            flip = i / N_SLICE1
+            _slice = i % N_SLICE1
+            if (getPruning(Slice_Flip_Prun, i) == depth):
+                for j in xrange(18):
+                    newSlice = FRtoBR_Move[_slice * 24][j] / 24
+                    newFlip = flipMove[flip][j]
+                    if (getPruning(Slice_Flip_Prun, N_SLICE1 * newFlip + newSlice) == 0x0f):
+                        setPruning(Slice_Flip_Prun, N_SLICE1 * newFlip + newSlice, (depth + 1) & 0xff)
+                        done += 1
+        depth += 1
+    return Slice_Flip_Prun
+
+
+# table name -> (function building the table, tables that function reads)
+table_builders = {
+    'twistMove': (build_twistMove, ()),
+    'flipMove': (build_flipMove, ()),
+    'FRtoBR_Move': (build_FRtoBR_Move, ()),
+    'URFtoDLF_Move': (build_URFtoDLF_Move, ()),
+    'URtoDF_Move': (build_URtoDF_Move, ()),
+    'URtoUL_Move': (build_URtoUL_Move, ()),
+    'UBtoDF_Move': (build_UBtoDF_Move, ()),
+    'MergeURtoULandUBtoDF': (build_MergeURtoULandUBtoDF, ()),
+    'Slice_URFtoDLF_Parity_Prun': (build_Slice_URFtoDLF_Parity_Prun, ('FRtoBR_Move', 'URFtoDLF_Move')),
+    'Slice_URtoDF_Parity_Prun': (build_Slice_URtoDF_Parity_Prun, ('FRtoBR_Move', 'URtoDF_Move')),
+    'Slice_Twist_Prun': (build_Slice_Twist_Prun, ('FRtoBR_Move', 'twistMove')),
+    'Slice_Flip_Prun': (build_Slice_Flip_Prun, ('FRtoBR_Move', 'flipMove')),
+}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('names', nargs='*', help='Tables to load, all of them by default')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    for name in args.names or sorted(table_builders):
+        getattr(CoordCube, name)
+    print CoordCube.load_report()
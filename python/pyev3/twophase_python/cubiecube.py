@@ -1,5 +1,3 @@
-import copy
-
 from corner import URF, UFL, ULB, UBR, DFR, DLF, DBL, DRB, corner_values
 from edge import UR, UF, UL, UB, DR, DF, DL, DB, FR, FL, BL, BR, edge_values
 from facelet import facelet_values
@@ -40,38 +38,88 @@ def rotateRight(arr, l, r):
     arr[l] = temp
 
 
+def _cornerOriProduct(oriA, oriB):
+    """
+    Orientation of a corner with orientation oriB in b, at a position where a has orientation oriA, in the product of
+    a and b. The orientations 3, 4 and 5 are those of mirrored corners, see CubieCube.cornerMultiply().
+    """
+    if oriA < 3 and oriB < 3:   # if both cubes are regular cubes...
+        ori = oriA + oriB   # just do an addition modulo 3 here
+        if ori >= 3:
+            ori -= 3    # the composition is a regular cube
+
+    # +++++++++++++++++++++mirrored cubes, see symtables.py +++++++++++++++++++++++++++++++++++
+    elif oriA < 3 and oriB >= 3:    # if cube b is in a mirrored state...
+        ori = oriA + oriB
+        if ori >= 6:
+            ori -= 3    # the composition is a mirrored cube
+    elif oriA >= 3 and oriB < 3:    # if cube a is an a mirrored state...
+        ori = oriA - oriB
+        if ori < 3:
+            ori += 3    # the composition is a mirrored cube
+    else:   # if both cubes are in mirrored states...
+        ori = oriA - oriB
+        if ori < 0:
+            ori += 3    # the composition is a regular cube
+    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+    return ori
+
+
+# CORNER_ORI_PRODUCT[6 * oriA + oriB] is _cornerOriProduct(oriA, oriB), CORNER_ORI_INVERSE[ori] the orientation of the
+# corner in the inverse cube
+CORNER_ORI_PRODUCT = tuple(_cornerOriProduct(oriA, oriB) for oriA in xrange(6) for oriB in xrange(6))
+CORNER_ORI_INVERSE = (0, 2, 1, 3, 4, 5)
+
+# The edge permutations of setURtoUL(i) and setUBtoDF(i) for every i, built by the first getURtoDF(idx1, idx2)
+_URtoUL_ep = None
+_UBtoDF_ep = None
+
+
+def _edge3Permutations(setter):
+    c = CubieCube()
+    result = []
+    for i in xrange(1320):  # 12!/(12-3)! permutations of three edges
+        setter(c, i)
+        result.append(tuple(c.ep))
+    return result
+
+
 def getURtoDF(idx1, idx2):
     """Permutation of the six edges UR,UF,UL,UB,DR,DF"""
-    a = CubieCube()
-    b = CubieCube()
-    a.setURtoUL(idx1)
-    b.setUBtoDF(idx2)
+    global _URtoUL_ep, _UBtoDF_ep
+    if _UBtoDF_ep is None:
+        _URtoUL_ep = _edge3Permutations(CubieCube.setURtoUL)
+        _UBtoDF_ep = _edge3Permutations(CubieCube.setUBtoDF)
+    a = _URtoUL_ep[idx1]
+    b = list(_UBtoDF_ep[idx2])
     for i in xrange(8):
-        if a.ep[i] != BR:
-            if b.ep[i] != BR:   # collision
+        if a[i] != BR:
+            if b[i] != BR:   # collision
                 return -1
             else:
-                b.ep[i] = a.ep[i]
-    return b.getURtoDF()
+                b[i] = a[i]
+    return CubieCube(ep=b).getURtoDF()
 
 
 class CubieCube(object):
     """Cube on the cubie level"""
 
+    __slots__ = ('cp', 'co', 'ep', 'eo')
+
     # initialize to Id-Cube
 
     def __init__(self, cp=None, co=None, ep=None, eo=None):
         # corner permutation
-        self.cp = copy.copy(cp) if cp else [ URF, UFL, ULB, UBR, DFR, DLF, DBL, DRB ]
+        self.cp = list(cp) if cp else [ URF, UFL, ULB, UBR, DFR, DLF, DBL, DRB ]
 
         # corner orientation
-        self.co = copy.copy(co) if co else [ 0, 0, 0, 0, 0, 0, 0, 0 ]
+        self.co = list(co) if co else [ 0, 0, 0, 0, 0, 0, 0, 0 ]
 
         # edge permutation
-        self.ep = copy.copy(ep) if ep else [ UR, UF, UL, UB, DR, DF, DL, DB, FR, FL, BL, BR ]
+        self.ep = list(ep) if ep else [ UR, UF, UL, UB, DR, DF, DL, DB, FR, FL, BL, BR ]
 
         # edge orientation
-        self.eo = copy.copy(eo) if eo else [ 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0 ]
+        self.eo = list(eo) if eo else [ 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0 ]
 
     def toFaceCube(self):
         """return cube in facelet representation"""
@@ -96,52 +144,20 @@ class CubieCube(object):
         Because we also describe reflections of the whole cube by permutations, we get a complication with the corners. The
         orientations of mirrored corners are described by the numbers 3, 4 and 5. The composition of the orientations
         cannot
-        be computed by addition modulo three in the cyclic group C3 any more. Instead the rules below give an addition in
-        the dihedral group D3 with 6 elements.<br>
+        be computed by addition modulo three in the cyclic group C3 any more. Instead the rules of _cornerOriProduct()
+        give an addition in the dihedral group D3 with 6 elements, looked up in CORNER_ORI_PRODUCT.<br>
 
-        NOTE: Because we do not use symmetry reductions and hence no mirrored cubes in this simple implementation of the
-        Two-Phase-Algorithm, some code is not necessary here.
+        NOTE: The search does not use mirrored cubes, only the symmetries of symtables.py do.
 
         b - CubieCube instance
         """
 
-        cPerm = []  # new Corner[8]
-        cOri = []   # new byte[8]
-        for i in corner_values:
-            cPerm.append(self.cp[b.cp[i]])
-
-            oriA = self.co[b.cp[i]]
-            oriB = b.co[i]
-            ori = 0
-
-            if oriA < 3 and oriB < 3:  # if both cubes are regular cubes...
-                ori = (oriA + oriB) & 0xff   # just do an addition modulo 3 here
-                if ori >= 3:
-                    ori -= 3    # the composition is a regular cube
-
-            # +++++++++++++++++++++not used in this implementation +++++++++++++++++++++++++++++++++++
-            elif oriA < 3 and oriB >= 3:    # if cube b is in a mirrored
-                # state...
-                ori = (oriA + oriB) & 0xff
-                if ori >= 6:
-                    ori -= 3    # the composition is a mirrored cube
-            elif oriA >= 3 and oriB < 3:    # if cube a is an a mirrored
-                # state...
-                ori = (oriA - oriB) & 0xff
-                if ori < 3:
-                    ori += 3    # the composition is a mirrored cube
-            elif oriA >= 3 and oriB >= 3:   # if both cubes are in mirrored
-                # states...
-                ori = (oriA - oriB) & 0xff
-                if ori < 0:
-                    ori += 3    # the composition is a regular cube
-            # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-
-            cOri.append(ori)
-
-        for i in corner_values:
-            self.cp[i] = cPerm[i]
-            self.co[i] = cOri[i]
+        cp = self.cp
+        co = self.co
+        product = CORNER_ORI_PRODUCT
+        cOri = [product[6 * co[j] + ori] for (j, ori) in zip(b.cp, b.co)]
+        cp[:] = [cp[j] for j in b.cp]
+        co[:] = cOri
 
     def edgeMultiply(self, b):
         """
@@ -150,16 +166,11 @@ class CubieCube(object):
         b - CubieCube instance
         """
 
-        ePerm = []  # new Edge[12]
-        eOri = []   # new byte[12]
-        for i in edge_values:
-            _ = b.ep[i]
-            ePerm.append(self.ep[_])
-            eOri.append(((b.eo[i] + self.eo[_]) % 2) & 0xff)
-
-        for i in edge_values:
-            self.ep[i] = ePerm[i]
-            self.eo[i] = eOri[i]
+        ep = self.ep
+        eo = self.eo
+        eOri = [eo[j] ^ ori for (j, ori) in zip(b.ep, b.eo)]    # addition modulo 2
+        ep[:] = [ep[j] for j in b.ep]
+        eo[:] = eOri
 
     def multiply(self, b):
         """
@@ -178,22 +189,13 @@ class CubieCube(object):
         c - CubieCube instance
         """
 
-        for i in edge_values:
-            c.ep[self.ep[i]] = i
-        for i in edge_values:
-            c.eo[i] = self.eo[c.ep[i]]
-        for i in corner_values:
-            c.cp[self.cp[i]] = i
-        for i in corner_values:
-            ori = self.co[c.cp[i]]
-            if ori >= 3:
-                # Just for completeness. We do not invert mirrored cubes in the program.
-                c.co[i] = ori
-            else:
-                # the standard case
-                c.co[i] = -ori
-                if c.co[i] < 0:
-                    c.co[i] += 3
+        for (i, j) in enumerate(self.ep):
+            c.ep[j] = i
+        c.eo[:] = [self.eo[j] for j in c.ep]
+        for (i, j) in enumerate(self.cp):
+            c.cp[j] = i
+        # Mirrored corners keep their orientation, we do not invert mirrored cubes in the program
+        c.co[:] = [CORNER_ORI_INVERSE[self.co[j]] for j in c.cp]
 
     # ********************************************* Get and set coordinates *********************************************
 
@@ -479,7 +481,7 @@ class CubieCube(object):
                 x -= 1
 
     def getURFtoDLB(self):
-        perm = copy.copy(self.cp)
+        perm = list(self.cp)
         b = 0
         for j in xrange(7, 0, -1):  # compute the index b < 8! for the permutation in perm
             k = 0
@@ -504,7 +506,7 @@ class CubieCube(object):
             x -= 1
 
     def getURtoBR(self):
-        perm = copy.copy(self.ep)
+        perm = list(self.ep)
         b = 0
         for j in xrange(11, 0, -1):     # compute the index b < 12! for the permutation in perm
             k = 0
@@ -51,7 +51,7 @@ class FaceCube(object):
 
     # Gives string representation of a facelet cube
     def to_String(self):
-        return ''.join(map(str, self.f))
+        return ''.join(color_keys[c] for c in self.f)
 
     # Gives CubieCube representation of a faceletcube
     def toCubieCube(self):
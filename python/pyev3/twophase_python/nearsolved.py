@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+
+"""
+Index of the cubes near the solved cube.
+
+Scrambles of a few moves, the cube after a half executed solution and re-scans of an almost solved cube are only a
+few moves from solved, but Search.solution() still sets up and runs the whole two-phase search for them. The index
+holds every cube at most depth moves from solved with an optimal solution of it, so those cubes are answered by one
+lookup.
+
+Every row of prunetables/NearSolved<depth>.tbl is 16 bytes: the first 8 bytes of the md5 digest of the cube
+definition string, followed by the moves of the solution as 3 * axis + power, plus 1, padded with 0. The rows are
+sorted by the digest and looked up by binary search on the memory-mapped file. A digest is no exact key of a cube, so
+the solution of a row is applied to the cube before it is answered.
+
+For a cube further away the index is the other end of a meet-in-the-middle search: search() tries the canonical
+sequences of up to extra moves, see canonical.py, and looks the cube after each of them up. The first number of extra
+moves with a hit gives an optimal solution of up to depth + extra moves.
+
+    depth      cubes    file   build
+      4       46,741   0.7MB    0.2s
+      5      621,649    10MB    3s
+      6    8,240,087   132MB    35s
+
+Building the index takes numpy, looking cubes up only the standard library:
+
+./nearsolved.py --build --depth 5
+./nearsolved.py --depth 5 --extra 2 UUUUUUUUURRRRRRRRRFFFFFFFFFDDDDDDDDDLLLLLLLLLBBBBBBBBB
+"""
+
+import argparse
+import hashlib
+import logging
+import os.path
+import time
+from operator import itemgetter
+
+import canonical
+import symmetry
+import tables
+from color import color_keys
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+log = logging.getLogger(__name__)
+
+DEFAULT_DEPTH = 5
+# Moves searched in front of the index by search()
+DEFAULT_EXTRA = 2
+KEY_SIZE = 8
+MAX_MOVES = 8
+ROW_SIZE = KEY_SIZE + MAX_MOVES
+
+SOLVED = ''.join(face * 9 for face in color_keys)
+MOVE_NAMES = [color_keys[axis] + suffix for axis in xrange(6) for suffix in ('', '2', "'")]
+# The move undoing each move
+INVERSE_MOVE = [3 * (move / 3) + 2 - move % 3 for move in xrange(canonical.N_MOVE)]
+
+
+def _cross(a, b):
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+
+
+def _face_turns():
+    """
+    For every face the source facelets of the cube after a clockwise quarter turn of that face, facelet j comes from
+    facelet source[j]: the facelets in front of the center plane of the face turn by -90 degrees around its normal.
+    """
+    result = []
+    for normal in symmetry.NORMALS:
+        source = range(54)
+        for (i, position) in enumerate(symmetry.FACELET_POSITIONS):
+            along = sum(n * p for (n, p) in zip(normal, position))
+            if along > 0:
+                crossed = _cross(normal, position)
+                turned = tuple(along * n - c for (n, c) in zip(normal, crossed))
+                source[symmetry.FACELET_INDEX[turned]] = i
+        result.append(source)
+    return result
+
+
+def _move_pickers():
+    """An itemgetter per move applying it to a cube definition string"""
+    result = []
+    for source in _face_turns():
+        composed = range(54)
+        for power in xrange(3):
+            composed = [composed[i] for i in source]
+            result.append(itemgetter(*composed))
+    return result
+
+
+MOVE_PICKERS = _move_pickers()
+
+
+def apply_move(facelets, move):
+    return ''.join(MOVE_PICKERS[move](facelets))
+
+
+def cube_key(facelets):
+    return hashlib.md5(facelets).digest()[:KEY_SIZE]
+
+
+def format_moves(moves):
+    """moves in the format of Search.solution() without separator"""
+    return ''.join(MOVE_NAMES[move] + ' ' for move in moves)
+
+
+def index_path(depth):
+    return tables.table_path('NearSolved%d' % depth, 'tbl')
+
+
+def build(depth, force=False):
+    """
+    Write the index of the cubes at most depth moves from solved. Returns True if it was written.
+
+    The cubes are enumerated by the canonical sequences applied to the solved cube, breadth first, so the first row of
+    every cube in the stable sort by key is one with an optimal solution.
+    """
+    if numpy is None:
+        raise RuntimeError('building the near solved index needs numpy')
+    if depth > MAX_MOVES:
+        raise ValueError('at most %d moves fit in a row' % MAX_MOVES)
+    path = index_path(depth)
+    if os.path.exists(path) and not force:
+        log.info('%s already exists', path)
+        return False
+
+    start = time.time()
+    keys = bytearray(cube_key(SOLVED))
+    solutions = bytearray(MAX_MOVES)
+    # (cube, its solution as row bytes, state of the canonical sequence reaching it)
+    level = [(SOLVED, '', canonical.START)]
+    transition = canonical.transition
+    for d in xrange(1, depth + 1):
+        following = []
+        padding = '\0' * (MAX_MOVES - d)
+        for (facelets, solution, state) in level:
+            for move in xrange(canonical.N_MOVE):
+                nextState = transition[canonical.N_MOVE * state + move]
+                if nextState < 0:
+                    continue
+                cube = ''.join(MOVE_PICKERS[move](facelets))
+                cubeSolution = chr(INVERSE_MOVE[move] + 1) + solution
+                keys += cube_key(cube)
+                solutions += cubeSolution + padding
+                if d < depth:
+                    following.append((cube, cubeSolution, nextState))
+        level = following
+        log.info('depth %d: %d sequences in %.1fs', d, len(solutions) / MAX_MOVES, time.time() - start)
+
+    rows = numpy.empty((len(keys) / KEY_SIZE, ROW_SIZE), dtype=numpy.uint8)
+    rows[:, :KEY_SIZE] = numpy.frombuffer(keys, dtype=numpy.uint8).reshape(-1, KEY_SIZE)
+    rows[:, KEY_SIZE:] = numpy.frombuffer(solutions, dtype=numpy.uint8).reshape(-1, MAX_MOVES)
+    # Big-endian keys sort like the byte strings the lookup compares
+    order = numpy.argsort(numpy.frombuffer(keys, dtype='>u8'), kind='mergesort')
+    rows = rows[order]
+    first = numpy.ones(len(rows), dtype=bool)
+    first[1:] = (rows[1:, :KEY_SIZE] != rows[:-1, :KEY_SIZE]).any(axis=1)
+    rows = rows[first]
+    tables.write_table(path, rows, 'B')
+    log.info('%s: %d cubes in %.1fs', path, len(rows), time.time() - start)
+    return True
+
+
+class NearSolved(object):
+    """The memory-mapped index of the cubes at most depth moves from solved"""
+
+    def __init__(self, depth=DEFAULT_DEPTH, extra=DEFAULT_EXTRA):
+        self.depth = depth
+        self.extra = extra
+        (self.mm, shape) = tables.mmap_rows(index_path(depth))
+        if shape[1] != ROW_SIZE:
+            raise tables.TableFormatError('%s: rows of %d bytes expected' % (index_path(depth), ROW_SIZE))
+        self.rows = shape[0]
+
+    def moves(self, facelets):
+        """The moves of an optimal solution of the cube definition string facelets, or None if it is not in the index"""
+        key = cube_key(facelets)
+        mm = self.mm
+        (lo, hi) = (0, self.rows)
+        while lo < hi:
+            mid = (lo + hi) / 2
+            offset = tables.HEADER.size + mid * ROW_SIZE
+            if mm[offset:offset + KEY_SIZE] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        offset = tables.HEADER.size + lo * ROW_SIZE
+        if lo == self.rows or mm[offset:offset + KEY_SIZE] != key:
+            return None
+
+        moves = [ord(c) - 1 for c in mm[offset + KEY_SIZE:offset + ROW_SIZE] if c != '\0']
+        cube = facelets
+        for move in moves:
+            cube = ''.join(MOVE_PICKERS[move](cube))
+        # Another cube with the same digest
+        if cube != SOLVED:
+            return None
+        return moves
+
+    def lookup(self, facelets):
+        """An optimal solution of facelets in the format of Search.solution(), or None"""
+        moves = self.moves(facelets)
+        return None if moves is None else format_moves(moves)
+
+    def search(self, facelets, maxDepth=None):
+        """
+        An optimal solution of facelets if it has at most depth + extra moves, and at most maxDepth, or None. The
+        sequences of 0, 1, ... extra moves are tried in turn, the first number of moves with a hit gives the solution.
+        """
+        if len(facelets) != 54:
+            return None
+        level = [(facelets, [], canonical.START)]
+        transition = canonical.transition
+        for extra in xrange(self.extra + 1):
+            best = None
+            for (cube, prefix, state) in level:
+                moves = self.moves(cube)
+                if moves is not None and (best is None or len(moves) < len(best)):
+                    best = prefix + moves
+            if best is not None:
+                return format_moves(best) if maxDepth is None or len(best) <= maxDepth else None
+            if extra == self.extra:
+                break
+            level = [(''.join(MOVE_PICKERS[move](cube)), prefix + [move], transition[canonical.N_MOVE * state + move])
+                     for (cube, prefix, state) in level for move in xrange(canonical.N_MOVE)
+                     if transition[canonical.N_MOVE * state + move] >= 0]
+        return None
+
+    def close(self):
+        self.mm.close()
+
+
+class NearSearch(object):
+    """A search answering the cubes near solved from a NearSolved index and the others from search.solution()"""
+
+    def __init__(self, near, search):
+        self.near = near
+        self.search = search
+
+    def solution(self, facelets, maxDepth, timeOut, useSeparator):
+        """
+        search.solution(), but without the two-phase search for the cubes near solved. Their solutions have no
+        separator, the index knows no phases.
+        """
+        solution = self.near.search(facelets, maxDepth)
+        if solution is None:
+            solution = self.search.solution(facelets, maxDepth, timeOut, useSeparator)
+        return solution
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--build', action='store_true', help='Build prunetables/NearSolved<depth>.tbl')
+    parser.add_argument('--force', action='store_true', help='With --build: rebuild it if it exists')
+    parser.add_argument('--depth', type=int, help='Moves from solved in the index', default=DEFAULT_DEPTH)
+    parser.add_argument('--extra', type=int, help='Moves searched in front of the index', default=DEFAULT_EXTRA)
+    parser.add_argument('facelet', nargs='*', help='Facelet strings to look up')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    if args.build:
+        build(args.depth, args.force)
+    if args.facelet:
+        near = NearSolved(args.depth, args.extra)
+        for facelets in args.facelet:
+            start = time.time()
+            solution = near.search(facelets)
+            print '%s %10.6fs %s' % (facelets, time.time() - start, 'not found' if solution is None else solution)
+    if not args.build and not args.facelet:
+        parser.error('--build or a facelet string is required')
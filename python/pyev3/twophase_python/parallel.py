@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+
+"""
+Search one cube on several processes by splitting the search tree at its first moves.
+
+Every solution of a cube C starts with some move m, and m followed by a solution of the cube C m of length maxDepth - 1
+is a solution of C. So each branch, a canonical sequence of split_depth first moves, is an independent search of the
+cube after those moves.
+
+Searching a whole branch can take very long when its shortest phase1 part is long, so a job is one iteration of the
+phase1 IDA* in one branch: all branches at phase1 depth 1, then all at depth 2, and so on, like Search.solution() does
+in one process. The jobs are handed out to a process pool attached to the shared table store, the first one returning
+a solution within maxDepth wins and the other workers are terminated.
+
+Benchmark the speedup on a fixed, seeded set of random cubes:
+
+./parallel.py --benchmark --count 10 --max-depth 20 --jobs 1 2 4 8 16
+"""
+
+import argparse
+import logging
+import multiprocessing
+import random
+import time
+
+import batch
+import canonical
+import symmetry
+import tablestore
+import tools
+from search import Search
+from verify import verify
+
+log = logging.getLogger(__name__)
+
+SOLVED = 'U' * 9 + 'R' * 9 + 'F' * 9 + 'D' * 9 + 'L' * 9 + 'B' * 9
+
+
+def branches(split_depth):
+    """
+    The move sequences of length split_depth as lists of (face, turns), skipping sequences the search skips too: the
+    ones that are not canonical, see canonical.py.
+    """
+    return [[(move / 3, move % 3 + 1) for move in sequence] for sequence in canonical.sequences(split_depth)]
+
+
+def join_solutions(prefix, moves):
+    """prefix followed by moves, merging the last move of prefix with the first of moves if they turn the same face"""
+    if prefix and moves and prefix[-1][0] == moves[0][0]:
+        turns = (prefix[-1][1] + moves[0][1]) % 4
+        if turns:
+            return prefix[:-1] + [(moves[0][0], turns)] + moves[1:]
+        return join_solutions(prefix[:-1], moves[1:])
+    return prefix + moves
+
+
+def search_branch(search, facelets, prefix, depthPhase1, maxDepth, deadline):
+    """
+    Search the solutions of facelets starting with the moves prefix followed by a phase1 part of depthPhase1 moves,
+    until the time.time() deadline. Returns the solution or the error code of Search.solution().
+    """
+    cube = symmetry.apply_moves(facelets, symmetry.format_solution(prefix))
+    if cube == SOLVED:
+        return symmetry.format_solution(prefix)
+    if maxDepth <= len(prefix):
+        return 'Error 7'
+
+    solution = next(search.search(cube, maxDepth - len(prefix), max(deadline - time.time(), 0), '',
+                                  depthsPhase1=(depthPhase1, depthPhase1)))
+    if solution.startswith('Error'):
+        return solution
+    return symmetry.format_solution(join_solutions(prefix, symmetry.parse_solution(solution)))
+
+
+def _search_branch_in_worker(job):
+    (facelets, prefix, depthPhase1, maxDepth, deadline) = job
+    return (prefix, search_branch(batch._search, facelets, prefix, depthPhase1, maxDepth, deadline))
+
+
+def solve_split(facelets, maxDepth=21, timeOut=10, jobs=None, split_depth=1, store_path=None, kernel=Search):
+    """
+    Search the cube facelets on jobs worker processes (one per CPU by default), one phase1 depth of one branch of
+    split_depth first moves at a time. Returns a result dict like batch.solve_one() with the first solution found
+    within maxDepth, the number of jobs finished and the first moves of the winning branch.
+    """
+    start = time.time()
+    deadline = start + timeOut
+    result = {'facelets': facelets}
+    error = verify(facelets)
+    if error:
+        result['error'] = 'Error %d' % abs(error)
+    elif facelets == SOLVED:
+        result['solution'] = ''
+
+    if 'error' not in result and 'solution' not in result:
+        work = [(facelets, prefix, depthPhase1, maxDepth, deadline)
+                for depthPhase1 in xrange(1, maxDepth - split_depth + 1)
+                for prefix in branches(split_depth)]
+        tablestore.TableStore.attach(store_path)
+        pool = multiprocessing.Pool(jobs, batch._init_worker, (store_path, kernel))
+        # The error if no branch has a solution: a timeout in any branch means a solution may still exist
+        result['error'] = 'Error 7'
+        try:
+            for (i, (prefix, solution)) in enumerate(pool.imap_unordered(_search_branch_in_worker, work)):
+                if solution.startswith('Error'):
+                    if solution == 'Error 8':
+                        result['error'] = solution
+                    continue
+                del result['error']
+                result['solution'] = solution.strip()
+                result['branch'] = symmetry.format_solution(prefix).strip()
+                result['jobs'] = i + 1
+                break
+            pool.close()
+        finally:
+            # Cancels the jobs still running
+            pool.terminate()
+            pool.join()
+
+    result['seconds'] = round(time.time() - start, 4)
+    return result
+
+
+def benchmark_cubes(count, seed):
+    """The fixed benchmark set: count random cubes from the random generator seeded with seed"""
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        return [tools.randomCube() for i in xrange(count)]
+    finally:
+        random.setstate(state)
+
+
+def benchmark(cubes, maxDepth, timeOut, jobs_list, split_depth=1):
+    """
+    Solve every cube of cubes with Search.solution() and with solve_split() for every number of processes in jobs_list.
+    Returns a list of (jobs, total seconds, speedup, solved, average length), jobs 0 being Search.solution().
+    """
+    # Both searches use the table store so neither is charged for loading the tables
+    tablestore.init_worker()
+    search = Search()
+    rows = []
+
+    for jobs in [0] + list(jobs_list):
+        seconds = 0.0
+        lengths = []
+        for facelets in cubes:
+            start = time.time()
+            if jobs:
+                solution = solve_split(facelets, maxDepth, timeOut, jobs, split_depth).get('solution', 'Error')
+            else:
+                solution = search.solution(facelets, maxDepth, timeOut, '')
+            seconds += time.time() - start
+            if not solution.startswith('Error'):
+                lengths.append(len(solution.split()))
+        rows.append((jobs, seconds, rows[0][1] / seconds if rows else 1.0, len(lengths),
+                     float(sum(lengths)) / len(lengths) if lengths else 0.0))
+        log.info('jobs %d: %.1fs', jobs, seconds)
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--benchmark', action='store_true', help='Compare the speed with Search.solution()')
+    parser.add_argument('--count', type=int, help='Number of cubes in the benchmark set', default=10)
+    parser.add_argument('--seed', type=int, help='Seed of the benchmark set', default=1)
+    parser.add_argument('--jobs', type=int, nargs='+', help='Numbers of processes', default=[None])
+    parser.add_argument('--split-depth', type=int, help='Number of first moves per branch', default=1)
+    parser.add_argument('--max-depth', type=int, help='Maximal solution length', default=20)
+    parser.add_argument('--timeout', type=float, help='Seconds allowed per cube', default=60)
+    parser.add_argument('facelet', nargs='?', help='Facelet string to solve', default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+
+    if args.benchmark:
+        cubes = benchmark_cubes(args.count, args.seed)
+        jobs_list = [jobs or multiprocessing.cpu_count() for jobs in args.jobs]
+        rows = benchmark(cubes, args.max_depth, args.timeout, jobs_list, args.split_depth)
+        print '%d cubes, seed %d, max depth %d, split depth %d, %d CPUs' % (
+            len(cubes), args.seed, args.max_depth, args.split_depth, multiprocessing.cpu_count())
+        print '%-10s %10s %8s %7s %7s' % ('jobs', 'seconds', 'speedup', 'solved', 'length')
+        for (jobs, seconds, speedup, solved, length) in rows:
+            print '%-10s %10.2f %8.2f %7d %7.2f' % (jobs or 'serial', seconds, speedup, solved, length)
+    elif args.facelet:
+        result = solve_split(args.facelet, args.max_depth, args.timeout, args.jobs[0], args.split_depth)
+        print result.get('solution', result.get('error'))
+    else:
+        parser.error('a facelet string or --benchmark is required')
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+
+"""
+Estimate how long the Rubiks robot takes to execute a solution, and pick the solution it executes fastest.
+
+The move count of a solution is a poor measure of the robot time: Rubiks.move() brings the face to turn down with up
+to two flips and a turntable rotation, depending on the current orientation of the cube, and a flip takes much longer
+than a rotation. RobotCostModel replays a solution through the same state machine as Rubiks.move() and
+Rubiks.run_kociemba_actions() and adds up the seconds of every robot action.
+
+Only uses the standard library so it can be imported on the EV3.
+
+./robotcost.py "R2 F' B' D' L' D2 L2 U' D2 F R U2 R2 L2 U2 F2 U L2 U' F2 D"
+./robotcost.py --solve --improve 5 LLUFURFRFRFBRRBLBUUBDLFDDFDRDFDDURRLDURDLFBLBLUBLBBFUU
+"""
+
+import argparse
+import time
+
+# The orientation of a freshly placed cube, Rubiks.state: the face at the bottom is the one at index 1
+INITIAL_STATE = ('U', 'D', 'F', 'L', 'B', 'R')
+
+# Rubiks.move(): the actions bringing the face at this index of the state down
+MOVE_ACTIONS = {
+    0: ('flip', 'flip'),
+    1: (),
+    2: ('rotate_cube_2', 'flip'),
+    3: ('rotate_cube_1', 'flip'),
+    4: ('flip',),
+    5: ('rotate_cube_3', 'flip'),
+}
+
+# Rubiks.run_kociemba_actions(): the blocked rotation turning the bottom face
+TURN_ACTIONS = {
+    "'": 'rotate_cube_blocked_1',
+    '2': 'rotate_cube_blocked_2',
+    '': 'rotate_cube_blocked_3',
+}
+
+# How the actions change Rubiks.state, see Rubiks.flip() and Rubiks.rotate_cube()
+FLIP = (2, 4, 1, 3, 0, 5)
+ROTATE_POSITIVE = (0, 1, 5, 2, 3, 4)
+ROTATE_NEGATIVE = (0, 1, 3, 4, 5, 2)
+TRANSFORMATIONS = {
+    'flip': (FLIP,),
+    'rotate_cube_1': (ROTATE_POSITIVE,),
+    'rotate_cube_2': (ROTATE_POSITIVE, ROTATE_POSITIVE),
+    'rotate_cube_3': (ROTATE_NEGATIVE,),
+}
+
+# Seconds per action measured on one robot, calibrate with the predicted and actual times logged by Rubiks.resolve().
+# push_arm_away is done by Rubiks.rotate_cube() when the arm still holds the cube after a flip or a blocked rotation.
+DEFAULT_SECONDS = {
+    'flip': 2.2,
+    'rotate_cube_1': 0.7,
+    'rotate_cube_2': 1.0,
+    'rotate_cube_3': 0.7,
+    'rotate_cube_blocked_1': 1.1,
+    'rotate_cube_blocked_2': 1.4,
+    'rotate_cube_blocked_3': 1.1,
+    'push_arm_away': 0.4,
+}
+
+
+def parse_move(move):
+    """Split a move like R, R' or R2 into the face and the turn suffix"""
+    return (move[0], move[1:])
+
+
+class RobotCostModel(object):
+    """The seconds the robot needs for each of its actions"""
+
+    def __init__(self, seconds=None):
+        self.seconds = dict(DEFAULT_SECONDS)
+        if seconds:
+            self.seconds.update(seconds)
+
+    def actions(self, solution, state=INITIAL_STATE):
+        """
+        Return (actions, state): the robot actions executing solution, a string of moves separated by spaces or a list
+        of moves, starting from the cube orientation state, and the orientation after the last one.
+        """
+        if isinstance(solution, basestring):
+            solution = solution.replace('.', ' ').split()
+        state = list(state)
+        held = False
+        actions = []
+
+        for move in solution:
+            (face, turn) = parse_move(move)
+            for action in MOVE_ACTIONS[state.index(face)]:
+                if action.startswith('rotate_cube'):
+                    if held:
+                        actions.append('push_arm_away')
+                        held = False
+                else:
+                    held = True
+                actions.append(action)
+                for transformation in TRANSFORMATIONS[action]:
+                    state = [state[t] for t in transformation]
+            actions.append(TURN_ACTIONS[turn])
+            held = True
+
+        return (actions, tuple(state))
+
+    def counts(self, solution, state=INITIAL_STATE):
+        """Number of times the robot does each action for solution"""
+        counts = dict.fromkeys(self.seconds, 0)
+        for action in self.actions(solution, state)[0]:
+            counts[action] += 1
+        return counts
+
+    def cost(self, solution, state=INITIAL_STATE):
+        """Predicted seconds for the robot to execute solution"""
+        return sum(self.seconds[action] for action in self.actions(solution, state)[0])
+
+    def min_move_cost(self):
+        """Lower bound of the seconds per move, the cheapest blocked rotation"""
+        return min(self.seconds[action] for action in TURN_ACTIONS.values())
+
+    def rank(self, solutions, state=INITIAL_STATE):
+        """The solutions sorted by predicted seconds, as (seconds, solution) tuples"""
+        return sorted((self.cost(solution, state), solution) for solution in solutions)
+
+
+def cheapest_solution(search, facelets, maxDepth, timeOut, improveTimeOut, state=INITIAL_STATE, model=None):
+    """
+    Search for solutions of facelets with search.solution_iter() and return (solution, predicted seconds) of the one
+    the robot executes fastest, or (error, None) if there is no solution.
+
+    Every solution found within improveTimeOut seconds is a candidate, not only the shorter ones. A candidate is only
+    worth finding while its length times the cheapest move cost is below the best cost so far, so the search depth is
+    lowered to that after each candidate.
+    """
+    model = model or RobotCostModel()
+    candidates = search.solution_iter(facelets, maxDepth, timeOut, '', improveTimeOut, shorter=False)
+    best = (None, None)
+    solution = next(candidates)
+    if solution.startswith('Error'):
+        return (solution, None)
+
+    try:
+        while True:
+            seconds = model.cost(solution, state)
+            if best[1] is None or seconds < best[1]:
+                best = (solution.strip(), seconds)
+            solution = candidates.send(int(best[1] / model.min_move_cost()))
+    except StopIteration:
+        pass
+    return best
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--solve', action='store_true', help='The argument is a facelet string to solve')
+    parser.add_argument('--improve', type=float, help='Seconds spent looking for cheaper solutions', default=5)
+    parser.add_argument('--timeout', type=float, help='Seconds allowed for the first solution', default=60)
+    parser.add_argument('--state', help='Robot cube orientation, %s by default' % ''.join(INITIAL_STATE),
+                        default=''.join(INITIAL_STATE))
+    parser.add_argument('cube', help='Solution, or facelet string with --solve')
+    args = parser.parse_args()
+
+    model = RobotCostModel()
+    state = tuple(args.state)
+
+    if args.solve:
+        from search import Search
+
+        search = Search()
+        first = search.solution(args.cube, 21, args.timeout, '')
+        print 'first:    %5.1fs %2d moves: %s' % (model.cost(first, state), len(first.split()), first)
+        start = time.time()
+        (solution, seconds) = cheapest_solution(search, args.cube, 21, args.timeout, args.improve, state, model)
+        if seconds is None:
+            print solution
+        else:
+            print 'cheapest: %5.1fs %2d moves: %s (searched %.1fs)' % (
+                seconds, len(solution.split()), solution, time.time() - start)
+    else:
+        counts = model.counts(args.cube, state)
+        print 'predicted %.1fs' % model.cost(args.cube, state)
+        for action in sorted(counts):
+            print '%-24s %3d' % (action, counts[action])
@@ -1,15 +1,90 @@
+import json
 import time
+import canonical
 from color import colors
 from facecube import FaceCube
 from coordcube import CoordCube, getPruning
 
 
+class SearchStats(object):
+    """
+    What one solve did, filled by the search while search.stats is a SearchStats, see Search.solution_stats().
+
+    Nodes are counted per depth within their phase: phase1Nodes[d] cubes were reached by d phase1 moves, phase2Nodes[d]
+    by d phase2 moves after a phase1 part. A node is pruned if its pruning value is larger than the moves left.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.phase1Nodes = [0] * 31
+        self.phase2Nodes = [0] * 31
+        self.phase1Pruned = 0
+        self.phase2Pruned = 0
+        self.phase1Lookups = 0      # pruning table lookups
+        self.phase2Lookups = 0
+        self.phase2Calls = 0        # phase1 parts ending in the H subgroup, totalDepth() calls
+        self.phase2Rejected = 0     # of those, the ones whose phase2 pruning values at the start are too large
+        self.phase2Seconds = 0.0
+        self.seconds = 0.0
+        self.depthPhase1 = None     # of the last solution found
+        self.length = None
+        self.solutionSeconds = None
+        self.phase2Cache = None     # Search.phase2CacheStats()
+
+    def phase2(self, totalDepth, depthPhase1, maxDepth):
+        """Call totalDepth(depthPhase1, maxDepth) and count the call and its time"""
+        start = time.time()
+        result = totalDepth(depthPhase1, maxDepth)
+        self.phase2Seconds += time.time() - start
+        self.phase2Calls += 1
+        return result
+
+    def found(self, depthPhase1, length, seconds):
+        self.depthPhase1 = depthPhase1
+        self.length = length
+        self.solutionSeconds = seconds
+
+    def to_dict(self):
+        """The counters as a dict of JSON types, the node lists without the unused depths"""
+        def used(nodes):
+            last = max([d for (d, count) in enumerate(nodes) if count] or [0])
+            return nodes[:last + 1]
+
+        phase1 = sum(self.phase1Nodes)
+        phase2 = sum(self.phase2Nodes)
+        return {
+            'phase1_nodes': used(self.phase1Nodes),
+            'phase2_nodes': used(self.phase2Nodes),
+            'phase1_pruned_rate': float(self.phase1Pruned) / phase1 if phase1 else 0.0,
+            'phase2_pruned_rate': float(self.phase2Pruned) / phase2 if phase2 else 0.0,
+            'phase1_lookups': self.phase1Lookups,
+            'phase2_lookups': self.phase2Lookups,
+            'phase2_calls': self.phase2Calls,
+            'phase2_rejected': self.phase2Rejected,
+            'phase1_seconds': round(self.seconds - self.phase2Seconds, 6),
+            'phase2_seconds': round(self.phase2Seconds, 6),
+            'seconds': round(self.seconds, 6),
+            'depth_phase1': self.depthPhase1,
+            'length': self.length,
+            'solution_seconds': None if self.solutionSeconds is None else round(self.solutionSeconds, 6),
+            'phase2_cache': self.phase2Cache,
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), sort_keys=True)
+
+
 class Search(object):
     """Class Search implements the Two-Phase-Algorithm."""
 
     ax_to_s = ["U", "R", "F", "D", "L", "B"]
     po_to_s = [None, " ", "2 ", "' "]
 
+    # Entries of the cache of phase2 results of one solve, see lookupPhase2(). 0 disables the cache.
+    phase2CacheSize = 100000
+
     def __init__(self):
         self.ax              = [0] * 31  # The axis of the move
         self.po              = [0] * 31  # The power of the move
@@ -24,6 +99,10 @@ class Search(object):
         self.URtoDF          = [0] * 31
         self.minDistPhase1   = [0] * 31  # IDA* distance do goal estimations
         self.minDistPhase2   = [0] * 31
+        self.phase2Cache     = {}        # phase2 results of the current solve
+        self.phase2Lookups   = 0
+        self.phase2Hits      = 0
+        self.stats           = None      # SearchStats filled by every solve, or None
 
     def solutionToString(self, length, depthPhase1=None):
         """generate the solution string from the array data"""
@@ -65,6 +144,50 @@ class Search(object):
                 Error 7: No solution exists for the given maxDepth<br>
                 Error 8: Timeout, no solution within given time
         """
+        return next(self.search(facelets, maxDepth, timeOut, useSeparator))
+
+    def solution_stats(self, facelets, maxDepth, timeOut, useSeparator):
+        """solution() counting what the search does. Returns (solution string, SearchStats)."""
+        (previous, self.stats) = (self.stats, SearchStats())
+        stats = self.stats
+        try:
+            start = time.time()
+            solution = self.solution(facelets, maxDepth, timeOut, useSeparator)
+            stats.seconds = time.time() - start
+            stats.phase2Cache = self.phase2CacheStats()
+        finally:
+            self.stats = previous
+        return (solution, stats)
+
+    def solution_iter(self, facelets, maxDepth, timeOut, useSeparator, improveTimeOut=None, shorter=True):
+        """
+        Anytime version of solution(): a generator yielding every shorter solution as the search finds it.
+
+        After a solution of length s the search goes on with maxDepth s - 1, also with longer phase1 parts, until no
+        shorter solution can exist or the time is up.
+
+        @param timeOut
+                 the maximum computing time in seconds, counted from the call.
+
+        @param improveTimeOut
+                 once a solution was found, stop looking for shorter ones after this many seconds counted from the
+                 call. The default is timeOut. With a small value the caller gets a good enough solution quickly,
+                 e.g. timeOut=60, improveTimeOut=1.
+
+        @param shorter
+                 with False every solution within maxDepth is yielded, not only the shorter ones. Used to pick the
+                 best solution by another measure than its length, see robotcost.py.
+
+        @return A generator of solution strings, each one shorter than the one before. If the cube has no solution
+                within maxDepth and timeOut it yields the error code of solution() instead. Sending a depth to the
+                generator instead of calling next() lowers maxDepth for the rest of the search.
+        """
+        return self.search(facelets, maxDepth, timeOut, useSeparator, improveTimeOut, anytime=True, shorter=shorter)
+
+    def initialize(self, facelets):
+        """
+        Check the cube definition string facelets and set up the coordinates at depth 0. Returns the error code or None.
+        """
 
         # +++++++++++++++++++++check for wrong input +++++++++++++++++++++++++++++
         count = [0] * 6
@@ -88,6 +211,10 @@ class Search(object):
         # +++++++++++++++++++++++ initialization +++++++++++++++++++++++++++++++++
         c = CoordCube(cc)
 
+        self.phase2Cache.clear()
+        self.phase2Lookups = 0
+        self.phase2Hits = 0
+
         self.po[0] = 0
         self.ax[0] = 0
         self.flip[0] = c.flip
@@ -99,24 +226,43 @@ class Search(object):
         self.URtoUL[0] = c.URtoUL
         self.UBtoDF[0] = c.UBtoDF
 
-        self.minDistPhase1[1] = 1   # else failure for depth=1, n=0
+    def search(self, facelets, maxDepth, timeOut, useSeparator, improveTimeOut=None, anytime=False, shorter=True,
+               depthsPhase1=None):
+        """
+        Generator running the two-phase search for solution() and solution_iter(). It yields the first solution, or
+        with anytime=True every shorter solution, or an error code if there is no solution at all.
+
+        depthsPhase1=(first, last) only tries phase1 parts of first to last moves, Error 7 then means there is no
+        solution with such a phase1 part. Used to split the search into pieces, see parallel.py.
+        """
+        (firstPhase1, lastPhase1) = depthsPhase1 or (1, maxDepth)
+
+        error = self.initialize(facelets)
+        if error:
+            yield error
+            return
+        stats = self.stats
+        if stats is not None:
+            stats.clear()
+
+        self.minDistPhase1[1] = firstPhase1   # else failure for depth=firstPhase1, n=0
         mv = 0
         n = 0
         busy = False
-        depthPhase1 = 1
+        depthPhase1 = firstPhase1
 
         tStart = time.time()
+        if improveTimeOut is None:
+            improveTimeOut = timeOut
+        found = False
 
         # +++++++++++++++++++ Main loop ++++++++++++++++++++++++++++++++++++++++++
         while True:
             while True:
                 if depthPhase1 - n > self.minDistPhase1[n + 1] and not busy:
-                    if self.ax[n] == 0 and self.ax[n] == 3:   # Initialize next move
-                        n += 1
-                        self.ax[n] = 1
-                    else:
-                        n += 1
-                        self.ax[n] = 0
+                    # Initialize next move with the first axis that may follow, see canonical.py
+                    n += 1
+                    self.ax[n] = canonical.firstAxis[self.ax[n - 1]]
                     self.po[n] = 1
                 else:
                     self.po[n] += 1
@@ -126,12 +272,16 @@ class Search(object):
                             self.ax[n] += 1
                             if self.ax[n] > 5:
 
-                                if time.time() - tStart > timeOut:
-                                    return "Error 8"
+                                if time.time() - tStart > (improveTimeOut if found else timeOut):
+                                    if not found:
+                                        yield "Error 8"
+                                    return
 
                                 if n == 0:
-                                    if depthPhase1 >= maxDepth:
-                                        return "Error 7"
+                                    if depthPhase1 >= min(maxDepth, lastPhase1):
+                                        if not found:
+                                            yield "Error 7"
+                                        return
                                     else:
                                         depthPhase1 += 1
                                         self.ax[n] = 0
@@ -147,7 +297,7 @@ class Search(object):
                                 self.po[n] = 1
                                 busy = False
 
-                            if not (n != 0 and (self.ax[n - 1] == self.ax[n] or self.ax[n - 1] - 3 == self.ax[n])):
+                            if n == 0 or canonical.transition[canonical.N_MOVE * self.ax[n - 1] + 3 * self.ax[n]] >= 0:
                                 break
                     else:
                         busy = False
@@ -171,17 +321,158 @@ class Search(object):
                 )
             )
             # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+            if stats is not None:
+                stats.phase1Nodes[n + 1] += 1
+                stats.phase1Lookups += 2
+                if self.minDistPhase1[n + 1] > depthPhase1 - n - 1:
+                    stats.phase1Pruned += 1
 
             if self.minDistPhase1[n + 1] == 0 and n >= depthPhase1 - 5:
                 self.minDistPhase1[n + 1] = 10  # instead of 10 any value >5 is possible
                 if n == depthPhase1 - 1:
-                    s = self.totalDepth(depthPhase1, maxDepth)
+                    if stats is None:
+                        s = self.totalDepth(depthPhase1, maxDepth)
+                    else:
+                        s = stats.phase2(self.totalDepth, depthPhase1, maxDepth)
+                    # totalDepth() continues the canonical sequence, the phase2 part may follow the phase1 part
                     if s >= 0:
-                        if (s == depthPhase1
-                            or (
-                                self.ax[depthPhase1 - 1] != self.ax[depthPhase1]
-                                and self.ax[depthPhase1 - 1] != self.ax[depthPhase1] + 3)):
-                            return self.solutionToString(s, depthPhase1) if useSeparator else self.solutionToString(s)
+                        if stats is not None:
+                            stats.found(depthPhase1, s, time.time() - tStart)
+                        limit = yield self.solutionToString(s, depthPhase1) if useSeparator else self.solutionToString(s)
+                        if not anytime:
+                            return
+
+                        # Every solution found from here on has at least depthPhase1 moves, once that is too many
+                        # the search is over.
+                        found = True
+                        if shorter:
+                            maxDepth = s - 1
+                        if limit is not None:
+                            maxDepth = min(maxDepth, limit)
+                        if depthPhase1 > maxDepth:
+                            return
+
+    def kernel(self):
+        """A callable making a search like this one, for the worker processes of batch.py and parallel.py"""
+        return type(self)
+
+    def solutions(self, facelets_list, maxDepth, timeOut, useSeparator, jobs=None):
+        """
+        Computes the solver strings for many cubes.
+
+        @param facelets_list
+                 is an iterable of cube definition strings.
+
+        @param maxDepth, timeOut, useSeparator
+                 are passed to solution() for every cube, timeOut is the limit for each cube on its own.
+
+        @param jobs
+                 is the number of worker processes, one per CPU by default. The workers share the tables through a
+                 table store, see tablestore.py, and search with the kernel() of this search. With jobs=1 the cubes
+                 are solved in this process.
+
+        @return A generator of dicts in the order of facelets_list. Each dict holds the facelets, the seconds it took and
+                either the solution string or the error returned by solution().
+        """
+        import batch
+
+        if jobs == 1:
+            return (batch.solve_one(self, facelets, maxDepth, timeOut, useSeparator) for facelets in facelets_list)
+        return batch.solve_many(facelets_list, maxDepth, timeOut, useSeparator, jobs, kernel=self.kernel())
+
+    def best_solution(self, facelets, maxDepth, timeOut, jobs=None):
+        """
+        Computes the shortest solution of the cube in its three axis orientations and as the inverse cube within timeOut
+        seconds.
+
+        @param jobs
+                 is the number of worker processes, one per variant by default, searching with the kernel() of this
+                 search. With jobs=1 the variants are searched one after another in this process, each for a sixth
+                 of timeOut.
+
+        @return A dict like solutions() yields, plus the variant the solution was found with.
+        """
+        import batch
+        import symmetry
+        from verify import verify
+
+        if jobs != 1:
+            return batch.solve_variants(facelets, maxDepth, timeOut, jobs, kernel=self.kernel())
+
+        start = time.time()
+        error = verify(facelets)
+        if error:
+            return {'facelets': facelets, 'error': 'Error %d' % abs(error), 'seconds': round(time.time() - start, 4)}
+        variants = symmetry.variants(facelets)
+        results = []
+        for (i, variant) in enumerate(variants):
+            # float() keeps an int timeOut from dividing the deadlines down to whole seconds
+            deadline = start + float(timeOut) * (i + 1) / len(variants)
+            results.append(batch.solve_variant(self, variant, maxDepth, deadline))
+        result = batch.best_variant(facelets, results)
+        result['seconds'] = round(time.time() - start, 4)
+        return result
+
+    def phase2Key(self, depthPhase1):
+        """
+        The phase2 coordinates at depthPhase1 and the axis of the last phase1 move, which decides the moves phase2
+        may start with. Together they determine the result of the phase2 search.
+        """
+        return (self.URFtoDLF[depthPhase1], self.FRtoBR[depthPhase1], self.parity[depthPhase1],
+                self.URtoDF[depthPhase1], self.ax[depthPhase1 - 1])
+
+    def lookupPhase2(self, depthPhase1, maxDepthPhase2):
+        """
+        Look the phase2 search at depthPhase1 up in the cache of this solve. Different phase1 parts often end in the
+        same cube, phase2 then needs not be searched again.
+
+        @return The phase2 depth, the moves are written to ax and po, -1 if phase2 has no solution within
+                maxDepthPhase2, or None if the cache does not know.
+        """
+        if not self.phase2CacheSize:
+            return None
+        self.phase2Lookups += 1
+        entry = self.phase2Cache.get(self.phase2Key(depthPhase1))
+        if entry is None:
+            return None
+
+        (depthPhase2, moves) = entry
+        if moves is None:
+            # No solution within depthPhase2 moves, a longer phase2 part is still unknown
+            if maxDepthPhase2 > depthPhase2:
+                return None
+            result = -1
+        elif depthPhase2 > maxDepthPhase2:
+            # depthPhase2 is the shortest phase2 part
+            result = -1
+        else:
+            for (i, mv) in enumerate(moves):
+                self.ax[depthPhase1 + i] = mv / 3
+                self.po[depthPhase1 + i] = mv % 3 + 1
+            result = depthPhase2
+        self.phase2Hits += 1
+        return result
+
+    def storePhase2(self, depthPhase1, maxDepthPhase2, depthPhase2):
+        """Cache the result of a phase2 search, depthPhase2 or -1 if there is no solution within maxDepthPhase2"""
+        if not self.phase2CacheSize:
+            return
+        if len(self.phase2Cache) >= self.phase2CacheSize:
+            self.phase2Cache.clear()
+        if depthPhase2 < 0:
+            self.phase2Cache[self.phase2Key(depthPhase1)] = (maxDepthPhase2, None)
+        else:
+            self.phase2Cache[self.phase2Key(depthPhase1)] = (depthPhase2, tuple(
+                3 * self.ax[i] + self.po[i] - 1 for i in xrange(depthPhase1, depthPhase1 + depthPhase2)))
+
+    def phase2CacheStats(self):
+        """Lookups, hits, hit rate and entries of the phase2 cache in the last solve"""
+        return {
+            'lookups': self.phase2Lookups,
+            'hits': self.phase2Hits,
+            'hit_rate': float(self.phase2Hits) / self.phase2Lookups if self.phase2Lookups else 0.0,
+            'entries': len(self.phase2Cache),
+        }
 
     def totalDepth(self, depthPhase1, maxDepth):
         """
@@ -192,6 +483,7 @@ class Search(object):
         mv = 0
         d1 = 0
         d2 = 0
+        stats = self.stats
         maxDepthPhase2 = min(10, maxDepth - depthPhase1)    # Allow only max 10 moves in phase2
         for i in xrange(depthPhase1):
             mv = 3 * self.ax[i] + self.po[i] - 1
@@ -203,7 +495,11 @@ class Search(object):
             CoordCube.Slice_URFtoDLF_Parity_Prun,
             (CoordCube.N_SLICE2 * self.URFtoDLF[depthPhase1] + self.FRtoBR[depthPhase1]) * 2 + self.parity[depthPhase1]
         )
+        if stats is not None:
+            stats.phase2Lookups += 1
         if d1 > maxDepthPhase2:
+            if stats is not None:
+                stats.phase2Rejected += 1
             return -1
 
         for i in xrange(depthPhase1):
@@ -217,13 +513,21 @@ class Search(object):
             CoordCube.Slice_URtoDF_Parity_Prun,
             (CoordCube.N_SLICE2 * self.URtoDF[depthPhase1] + self.FRtoBR[depthPhase1]) * 2 + self.parity[depthPhase1]
         )
+        if stats is not None:
+            stats.phase2Lookups += 1
         if d2 > maxDepthPhase2:
+            if stats is not None:
+                stats.phase2Rejected += 1
             return -1
 
         self.minDistPhase2[depthPhase1] = max(d1, d2)
         if self.minDistPhase2[depthPhase1] == 0:    # already solved
             return depthPhase1
 
+        depthPhase2 = self.lookupPhase2(depthPhase1, maxDepthPhase2)
+        if depthPhase2 is not None:
+            return depthPhase1 + depthPhase2 if depthPhase2 >= 0 else -1
+
         # now set up search
 
         depthPhase2 = 1
@@ -260,6 +564,7 @@ class Search(object):
                             if self.ax[n] > 5:
                                 if n == depthPhase1:
                                     if depthPhase2 >= maxDepthPhase2:
+                                        self.storePhase2(depthPhase1, maxDepthPhase2, -1)
                                         return -1
                                     else:
                                         depthPhase2 += 1
@@ -278,7 +583,8 @@ class Search(object):
                                     self.po[n] = 2
                                 busy = False
 
-                            if not (n != depthPhase1 and (self.ax[n - 1] == self.ax[n] or self.ax[n - 1] - 3 == self.ax[n])):
+                            # The first phase2 move has to follow the last phase1 move too
+                            if canonical.transition[canonical.N_MOVE * self.ax[n - 1] + 3 * self.ax[n]] >= 0:
                                 break
 
                     else:
@@ -306,8 +612,14 @@ class Search(object):
                 )
             )
             # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+            if stats is not None:
+                stats.phase2Nodes[n + 1 - depthPhase1] += 1
+                stats.phase2Lookups += 2
+                if self.minDistPhase2[n + 1] > depthPhase1 + depthPhase2 - n - 1:
+                    stats.phase2Pruned += 1
 
             if self.minDistPhase2[n + 1] == 0:
                 break
 
+        self.storePhase2(depthPhase1, maxDepthPhase2, depthPhase2)
         return depthPhase1 + depthPhase2
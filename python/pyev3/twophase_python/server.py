@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+
+"""
+Solver daemon keeping the twophase tables loaded between solves.
+
+Clients connect over TCP or a unix socket and send one JSON object per line, see client.py:
+
+    {"facelets": "<54 facelets>", "max_depth": 21, "timeout": 10}   ->  {"solution": "R2 F' ...", "seconds": 0.3}
+                                                                     or  {"error": "Error 7", "seconds": 12.1}
+    {"cmd": "ping"}                                                  ->  {"ok": true}
+
+With "improve_timeout": <seconds> the daemon keeps looking for shorter solutions until that many seconds have passed
+and answers the shortest one, see Search.solution_iter(). With "robot_state": "UDFLBR", the orientation of the cube in
+the Rubiks robot, it answers the solution the robot executes fastest and its "predicted_seconds", see robotcost.py. With "stats": true
+a plain request also gets the "stats" of the search, see search.SearchStats.
+
+Several requests can be sent on one connection. Every connection is served by its own thread with its own Search.
+
+With --cache <file> the plain requests are answered from a solution cache shared by all connections when the cube, or
+the cube held another way, was solved before, see solutioncache.py. The response then has "cached": true.
+With --near <depth> the requests without robot_state for cubes a few moves from solved are answered from the index of
+nearsolved.py, with an optimal solution and without the two-phase search.
+
+./server.py --listen 0.0.0.0:8484
+./server.py --listen /tmp/twophase.sock
+"""
+
+import argparse
+import json
+import logging
+import os
+import SocketServer
+import time
+
+import robotcost
+from client import parse_address
+from coordcube import CoordCube
+from search import Search
+
+log = logging.getLogger(__name__)
+
+# Upper limits for what a client may ask for
+MAX_REQUEST_LENGTH = 4096
+MAX_TIMEOUT = 600
+
+
+class SolverHandler(SocketServer.StreamRequestHandler):
+    # Search or fastsearch.FastSearch
+    search_class = Search
+    # solutioncache.SolutionCache or None
+    cache = None
+    # nearsolved.NearSolved or None
+    near = None
+
+    def handle(self):
+        search = self.search_class()
+        while True:
+            line = self.rfile.readline(MAX_REQUEST_LENGTH)
+            if not line:
+                break
+            if len(line) == MAX_REQUEST_LENGTH and not line.endswith('\n'):
+                # Drop the rest of the request, one reply per request keeps the replies in step with the requests
+                while line and not line.endswith('\n'):
+                    line = self.rfile.readline(MAX_REQUEST_LENGTH)
+                response = {'error': 'bad request: longer than %d bytes' % MAX_REQUEST_LENGTH}
+            else:
+                response = self.respond(search, line)
+            self.wfile.write(json.dumps(response) + '\n')
+            self.wfile.flush()
+
+    def respond(self, search, line):
+        try:
+            request = json.loads(line)
+            if request.get('cmd') == 'ping':
+                return {'ok': True}
+            facelets = str(request['facelets'])
+            maxDepth = int(request.get('max_depth', 21))
+            timeOut = min(float(request.get('timeout', 10)), MAX_TIMEOUT)
+            improveTimeOut = request.get('improve_timeout')
+            if improveTimeOut is not None:
+                improveTimeOut = min(float(improveTimeOut), timeOut)
+            wantStats = bool(request.get('stats'))
+            robotState = request.get('robot_state')
+            if robotState is not None:
+                robotState = tuple(str(robotState))
+                if sorted(robotState) != sorted(robotcost.INITIAL_STATE):
+                    raise ValueError('robot_state must be an order of the faces URFDLB')
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            return {'error': 'bad request: %s' % e}
+
+        start = time.time()
+        predicted = None
+        stats = None
+        cached = None
+        if robotState is None and improveTimeOut is None and self.cache is not None:
+            cached = self.cache.get(facelets, maxDepth)
+        near = None
+        if cached is None and robotState is None and self.near is not None:
+            near = self.near.search(facelets, maxDepth)
+
+        if cached is not None:
+            solution = cached
+        elif near is not None:
+            solution = near
+        elif robotState is not None:
+            (solution, predicted) = robotcost.cheapest_solution(
+                search, facelets, maxDepth, timeOut, timeOut if improveTimeOut is None else improveTimeOut, robotState)
+        elif improveTimeOut is None and wantStats:
+            (solution, stats) = search.solution_stats(facelets, maxDepth, timeOut, useSeparator=False)
+        elif improveTimeOut is None:
+            solution = search.solution(facelets, maxDepth, timeOut, useSeparator=False)
+        else:
+            for solution in search.solution_iter(facelets, maxDepth, timeOut, False, improveTimeOut):
+                pass
+        seconds = round(time.time() - start, 4)
+        log.info('%s %s in %.3fs', facelets, solution, seconds)
+        if solution.startswith('Error'):
+            response = {'error': solution, 'seconds': seconds}
+            if stats is not None:
+                # Most wanted for the timeouts
+                response['stats'] = stats.to_dict()
+            return response
+        response = {'solution': solution.strip(), 'seconds': seconds}
+        if cached is not None:
+            response['cached'] = True
+        elif robotState is None and improveTimeOut is None and self.cache is not None:
+            # Only the plain requests use the cache: the cheapest solution for the robot is no good answer for the
+            # others, and the improved ones bypass it both ways
+            self.cache.put(facelets, solution)
+        if predicted is not None:
+            response['predicted_seconds'] = round(predicted, 1)
+        if stats is not None:
+            response['stats'] = stats.to_dict()
+        return response
+
+
+class TCPSolverServer(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class UnixSolverServer(SocketServer.ThreadingMixIn, SocketServer.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(address):
+    """
+    Return a solver server listening on address, 'host:port' or a unix socket path. Port 0 picks a free port, see
+    server.server_address.
+    """
+    (family, address) = parse_address(address)
+    if isinstance(address, str):
+        if os.path.exists(address):
+            os.remove(address)
+        return UnixSolverServer(address, SolverHandler)
+    return TCPSolverServer(address, SolverHandler)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--listen', default='127.0.0.1:8484', help='host:port or unix socket path to listen on')
+    parser.add_argument('--fast', action='store_true', help='Use the faster search kernel of fastsearch.py')
+    parser.add_argument('--unpacked', action='store_true',
+                        help='With --fast: pruning tables with one entry per byte, twice the memory but faster')
+    parser.add_argument('--phase1', choices=('auto', 'classic', 'sym'), default='auto',
+                        help='With --fast: phase1 pruning tables, sym needs ./symtables.py --build first')
+    parser.add_argument('--ordered', action='store_true', help='With --fast: order the phase1 moves by pruning value')
+    parser.add_argument('--cache', help='Key-value file of a solution cache, see solutioncache.py', default=None)
+    parser.add_argument('--cache-size', type=int, help='Solutions the cache keeps in memory', default=10000)
+    parser.add_argument('--near', type=int, default=None,
+                        help='Answer cubes near solved from the index of this depth, see nearsolved.py')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    CoordCube.load_all()
+    if args.fast:
+        import functools
+        from fastsearch import FastSearch, FlatTables, OrderedSearch
+
+        FlatTables.get(args.unpacked, args.phase1)
+        SolverHandler.search_class = functools.partial(OrderedSearch if args.ordered else FastSearch, args.unpacked,
+                                                       args.phase1)
+    log.info('tables loaded\n%s', CoordCube.load_report())
+    if args.cache:
+        from solutioncache import SolutionCache
+
+        SolverHandler.cache = SolutionCache(args.cache, args.cache_size)
+    if args.near:
+        from nearsolved import NearSolved
+
+        SolverHandler.near = NearSolved(args.near)
+
+    server = make_server(args.listen)
+    log.info('listening on %s', args.listen)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if SolverHandler.cache is not None:
+            SolverHandler.cache.close()
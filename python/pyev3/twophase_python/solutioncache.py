@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+
+"""
+Cache of solutions in front of Search.solution().
+
+Demo scrambles, sanity runs with the solved cube and re-scans after a failed attempt ask for the same cubes again and
+again, often held another way. The key of a cube is its canonical form: the smallest of the 24 cube definition strings
+of the cube rotated as a whole, with the facelets renamed after the faces the centers moved to like symmetry.rotate()
+does. A cached solution solves the canonical form and is rotated back for the caller, which only renames the faces of
+its moves.
+
+The most recently used solutions are kept in memory. With a path all of them are also written to a key-value file
+(anydbm) which survives restarts of the solver.
+
+Solve a cube twice, the second time from the cache:
+
+./solutioncache.py --cache /tmp/solutions.db DRLUUBFBRBLURRLRUBLRDDFDLFUFUFFDBRDUBRUFLLFDDBFLUBLRBD
+"""
+
+import anydbm
+import argparse
+import collections
+import string
+import threading
+import time
+from operator import itemgetter
+
+import symmetry
+from color import color_keys
+
+# Solutions kept in memory
+DEFAULT_SIZE = 10000
+
+FACES = ''.join(color_keys)
+
+
+def _rotation_tables():
+    """
+    For every rotation of symmetry.CUBE_ROTATIONS: an itemgetter picking the facelets of the rotated cube, and the
+    translate tables renaming the faces of the facelets or moves to the rotated cube and back.
+    """
+    result = []
+    for matrix in symmetry.CUBE_ROTATIONS:
+        (source, faces) = symmetry.rotation_maps(matrix)
+        rotated = ''.join(color_keys[face] for face in faces)
+        result.append((itemgetter(*source), string.maketrans(FACES, rotated), string.maketrans(rotated, FACES)))
+    return result
+
+
+ROTATION_TABLES = _rotation_tables()
+
+
+def canonical(facelets):
+    """
+    Return (canonical form, rotation): the smallest rotated cube definition string of facelets, and the index of the
+    rotation giving it in symmetry.CUBE_ROTATIONS. None if facelets is not made of 54 face names.
+    """
+    if len(facelets) != 54 or facelets.strip(FACES):
+        return None
+    best = None
+    for (rotation, (pick, forward, back)) in enumerate(ROTATION_TABLES):
+        rotated = ''.join(pick(facelets.translate(forward)))
+        if best is None or rotated < best[0]:
+            best = (rotated, rotation)
+    return best
+
+
+def normalize(solution):
+    """solution in the format of Search.solution() without separator: every move followed by a space"""
+    return ''.join(move + ' ' for move in solution.replace('.', ' ').split())
+
+
+class SolutionCache(object):
+    """Solutions by canonical form, the last size used ones in memory and all of them in the file at path if given"""
+
+    def __init__(self, path=None, size=DEFAULT_SIZE):
+        self.size = size
+        self.memory = collections.OrderedDict()
+        self.db = anydbm.open(path, 'c') if path else None
+        # The solver daemon serves every connection from its own thread
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, key):
+        """The solution stored for the canonical form key, now the most recently used one, or None"""
+        solution = self.memory.pop(key, None)
+        if solution is None and self.db is not None and key in self.db:
+            solution = self.db[key]
+        if solution is not None:
+            self._remember(key, solution)
+        return solution
+
+    def _remember(self, key, solution):
+        self.memory[key] = solution
+        while len(self.memory) > self.size:
+            self.memory.popitem(last=False)
+
+    def get(self, facelets, maxDepth=None):
+        """A cached solution of the cube definition string facelets with at most maxDepth moves, or None"""
+        key = canonical(facelets)
+        if key is None:
+            return None
+        (form, rotation) = key
+        with self.lock:
+            solution = self._load(form)
+            if solution is None or (maxDepth is not None and len(solution.split()) > maxDepth):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return solution.translate(ROTATION_TABLES[rotation][2])
+
+    def put(self, facelets, solution):
+        """Cache solution, a solution of facelets as returned by Search.solution(), unless a shorter one is cached"""
+        key = canonical(facelets)
+        if key is None or solution.startswith('Error'):
+            return
+        (form, rotation) = key
+        solution = normalize(solution).translate(ROTATION_TABLES[rotation][1])
+        with self.lock:
+            cached = self._load(form)
+            if cached is not None and len(cached.split()) <= len(solution.split()):
+                return
+            self._remember(form, solution)
+            if self.db is not None:
+                self.db[form] = solution
+                if hasattr(self.db, 'sync'):
+                    self.db.sync()
+
+    def solution(self, search, facelets, maxDepth, timeOut, useSeparator):
+        """
+        search.solution() through the cache. Solutions with a separator between the phases are not cached, the phases
+        of a rotated solution are not those of the rotated cube.
+        """
+        if useSeparator:
+            return search.solution(facelets, maxDepth, timeOut, useSeparator)
+        solution = self.get(facelets, maxDepth)
+        if solution is None:
+            solution = search.solution(facelets, maxDepth, timeOut, useSeparator)
+            self.put(facelets, solution)
+        return solution
+
+    def stats(self):
+        """Hits, misses and hit rate since the cache was opened, and the number of solutions in memory"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+            'entries': len(self.memory),
+        }
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cache', help='Key-value file of the cache, memory only by default', default=None)
+    parser.add_argument('--max-depth', type=int, help='Maximal solution length', default=21)
+    parser.add_argument('--timeout', type=float, help='Seconds allowed for the search', default=60)
+    parser.add_argument('facelet', help='Facelet string to solve')
+    args = parser.parse_args()
+
+    from search import Search
+
+    cache = SolutionCache(args.cache)
+    search = Search()
+    try:
+        for attempt in ('first', 'second'):
+            start = time.time()
+            solution = cache.solution(search, args.facelet, args.max_depth, args.timeout, '')
+            print '%-6s %10.6fs %s' % (attempt, time.time() - start, solution)
+        print cache.stats()
+    finally:
+        cache.close()
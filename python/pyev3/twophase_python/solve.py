@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 
 import argparse
+import sys
+import time
 from search import Search
 
 '''
@@ -43,11 +45,119 @@ B = LUBLBBFUU
 
 Which you pass to Search.solution() as one big string
 LLUFURFRFRFBRRBLBUUBDLFDDFDRDFDDURRLDURDLFBLBLUBLBBFUU
+
+Batch mode reads one facelet string per line from a file (- for stdin) and writes one JSON object per line with the
+facelets, the solution or the error and the seconds it took:
+
+./solve.py --batch scrambles.txt --jobs 8 --timeout 10 > solutions.jsonl
+
+--improve SECONDS keeps looking for shorter solutions for that long, printing each one with the time it was found to
+stderr, and prints the shortest one:
+
+./solve.py --improve 5 LLUFURFRFRFBRRBLBUUBDLFDDFDRDFDDURRLDURDLFBLBLUBLBBFUU
+
+--variants also searches the cube in its other two axis orientations and as the inverse cube, each in its own worker
+process, and prints the shortest solution found within --timeout seconds:
+
+./solve.py --variants --timeout 10 LLUFURFRFRFBRRBLBUUBDLFDDFDRDFDDURRLDURDLFBLBLUBLBBFUU
+
+--split searches the cube on --jobs worker processes, each searching one first move at one phase1 depth at a time, see parallel.py:
+
+./solve.py --split --jobs 16 --max-depth 20 LLUFURFRFRFBRRBLBUUBDLFDDFDRDFDDURRLDURDLFBLBLUBLBBFUU
+
+The workers of --batch, --variants and --split search with the kernel chosen by --fast, --unpacked, --phase1 and
+--ordered. --improve, --stats, --cache and --near only work on a single cube without them.
+
+--stats writes what the search did to stderr as JSON: the nodes per depth of both phases, how many were pruned, the
+pruning table lookups, the phase2 searches and the seconds spent in each phase, see search.SearchStats:
+
+./solve.py --stats LLUFURFRFRFBRRBLBUUBDLFDDFDRDFDDURRLDURDLFBLBLUBLBBFUU
 '''
 
 parser = argparse.ArgumentParser()
-parser.add_argument('facelet', help='Facelet string', default=None)
+parser.add_argument('facelet', nargs='?', help='Facelet string', default=None)
+parser.add_argument('--batch', help='Solve the facelet strings in this file, - for stdin', default=None)
+parser.add_argument('--jobs', type=int, help='Worker processes for --batch and --split (one per CPU by default) or --variants', default=None)
+parser.add_argument('--timeout', type=float, help='Seconds allowed per cube', default=None)
+parser.add_argument('--max-depth', type=int, help='Maximal solution length', default=21)
+parser.add_argument('--improve', type=float, help='Seconds spent looking for shorter solutions', default=None)
+parser.add_argument('--variants', action='store_true', help='Search the other orientations and the inverse cube too')
+parser.add_argument('--split', action='store_true', help='Split the search of one cube across --jobs processes')
+parser.add_argument('--fast', action='store_true', help='Use the faster search kernel of fastsearch.py')
+parser.add_argument('--unpacked', action='store_true', help='With --fast: pruning tables with one entry per byte')
+parser.add_argument('--phase1', choices=('auto', 'classic', 'sym'), default='auto',
+                    help='With --fast: phase1 pruning tables, sym needs ./symtables.py --build first')
+parser.add_argument('--ordered', action='store_true', help='With --fast: order the phase1 moves by pruning value')
+parser.add_argument('--cache', help='Key-value file of a solution cache, see solutioncache.py', default=None)
+parser.add_argument('--stats', action='store_true', help='Write the counters of the search to stderr as JSON')
+parser.add_argument('--near', type=int, help='Answer cubes near solved from the index of this depth, see nearsolved.py',
+                    default=None)
 args = parser.parse_args()
 
-cube = Search()
-print cube.solution(args.facelet, maxDepth=21, timeOut=600, useSeparator='')
+if (args.unpacked or args.ordered) and not args.fast:
+    parser.error('--unpacked and --ordered need --fast')
+# The worker processes of these modes run kernel.solution() and solution_iter() alone
+pool_modes = [name for (name, given) in (('--batch', args.batch), ('--variants', args.variants),
+                                         ('--split', args.split)) if given]
+single_options = [name for (name, given) in (('--improve', args.improve is not None), ('--stats', args.stats),
+                                             ('--cache', args.cache), ('--near', args.near)) if given]
+if pool_modes and single_options:
+    parser.error('%s cannot be combined with %s' % (pool_modes[0], ', '.join(single_options)))
+
+if args.fast:
+    import functools
+    from fastsearch import FastSearch, OrderedSearch
+
+    kernel = functools.partial(OrderedSearch if args.ordered else FastSearch, args.unpacked, args.phase1)
+else:
+    kernel = Search
+
+
+def plain_kernel():
+    """kernel() for solution() alone, in front of the index of the cubes near solved with --near"""
+    if not args.near:
+        return kernel()
+    from nearsolved import NearSearch, NearSolved
+
+    return NearSearch(NearSolved(args.near), kernel())
+
+
+if args.batch:
+    import batch
+
+    f = sys.stdin if args.batch == '-' else open(args.batch)
+    results = kernel().solutions(
+        batch.read_facelets(f), args.max_depth, args.timeout or 10, useSeparator='', jobs=args.jobs)
+    sys.exit(1 if batch.write_results(results, sys.stdout) else 0)
+elif args.facelet and args.variants:
+    result = kernel().best_solution(args.facelet, args.max_depth, args.timeout or 10, jobs=args.jobs)
+    print result.get('solution', result.get('error'))
+elif args.facelet and args.split:
+    import parallel
+
+    result = parallel.solve_split(args.facelet, args.max_depth, args.timeout or 600, args.jobs, kernel=kernel)
+    print result.get('solution', result.get('error'))
+elif args.facelet and args.improve is not None:
+    cube = kernel()
+    start = time.time()
+    for solution in cube.solution_iter(args.facelet, args.max_depth, args.timeout or 600, '', args.improve):
+        if not solution.startswith('Error'):
+            sys.stderr.write('%.2fs %2d moves: %s\n' % (time.time() - start, len(solution.split()), solution))
+    print solution
+elif args.facelet and args.stats:
+    (solution, stats) = kernel().solution_stats(args.facelet, args.max_depth, args.timeout or 600, '')
+    print solution
+    sys.stderr.write(stats.to_json() + '\n')
+elif args.facelet and args.cache:
+    from solutioncache import SolutionCache
+
+    cache = SolutionCache(args.cache)
+    try:
+        print cache.solution(plain_kernel(), args.facelet, args.max_depth, args.timeout or 600, '')
+    finally:
+        cache.close()
+elif args.facelet:
+    cube = plain_kernel()
+    print cube.solution(args.facelet, maxDepth=args.max_depth, timeOut=args.timeout or 600, useSeparator='')
+else:
+    parser.error('a facelet string or --batch is required')
@@ -0,0 +1,173 @@
+"""
+Whole cube rotations and the inverse cube.
+
+The two-phase search is not symmetric: phase 1 solves towards the UD axis, so the same cube held with the FB or the RL
+axis up, or its inverse, often has a much shorter solution. variants() returns those six cubes and to_original() maps
+a solution of a variant back to a solution of the original cube.
+
+Rotations are computed from the positions of the facelets in space: x points to R, y to U and z to F, a facelet is at
+3 times the normal of its face plus twice its offset from the center of the face.
+"""
+
+import itertools
+
+from color import color_keys, colors
+from cubiecube import CubieCube, moveCube
+from facecube import FaceCube
+
+# Normal of each face, in color order U R F D L B
+NORMALS = ((0, 1, 0), (1, 0, 0), (0, 0, 1), (0, -1, 0), (-1, 0, 0), (0, 0, -1))
+
+# For the 3x3 facelets of each face: the directions of the rows and of the columns in space
+FACE_AXES = (
+    ((0, 0, 1), (1, 0, 0)),     # U, U1 is at the back left
+    ((0, -1, 0), (0, 0, -1)),   # R, R1 is at the top front
+    ((0, -1, 0), (1, 0, 0)),    # F, F1 is at the top left
+    ((0, 0, -1), (1, 0, 0)),    # D, D1 is at the front left
+    ((0, -1, 0), (0, 0, 1)),    # L, L1 is at the top back
+    ((0, -1, 0), (-1, 0, 0)),   # B, B1 is at the top right
+)
+
+# 120 degree rotation around the URF-DBL diagonal, R goes to U, U to F and F to R
+ROTATE_URF = ((0, 0, 1), (1, 0, 0), (0, 1, 0))
+IDENTITY = ((1, 0, 0), (0, 1, 0), (0, 0, 1))
+
+TURN_SUFFIX = {1: '', 2: '2', 3: "'"}
+SUFFIX_TURN = {'': 1, '2': 2, "'": 3}
+
+
+def _apply(matrix, v):
+    return tuple(sum(matrix[r][c] * v[c] for c in xrange(3)) for r in xrange(3))
+
+
+def _multiply(a, b):
+    return tuple(tuple(sum(a[r][k] * b[k][c] for k in xrange(3)) for c in xrange(3)) for r in xrange(3))
+
+
+def _transpose(a):
+    return tuple(tuple(a[c][r] for c in xrange(3)) for r in xrange(3))
+
+
+def _determinant(a):
+    return (a[0][0] * (a[1][1] * a[2][2] - a[1][2] * a[2][1]) - a[0][1] * (a[1][0] * a[2][2] - a[1][2] * a[2][0])
+            + a[0][2] * (a[1][0] * a[2][1] - a[1][1] * a[2][0]))
+
+
+def _cube_rotations():
+    """The 24 rotations of the cube as a whole, the matrices permuting the axes with signs and determinant 1"""
+    result = []
+    for perm in itertools.permutations(xrange(3)):
+        for signs in itertools.product((1, -1), repeat=3):
+            matrix = tuple(tuple(signs[r] if c == perm[r] else 0 for c in xrange(3)) for r in xrange(3))
+            if _determinant(matrix) == 1:
+                result.append(matrix)
+    return result
+
+
+def _facelet_positions():
+    positions = []
+    for face in xrange(6):
+        (rows, cols) = FACE_AXES[face]
+        for i in xrange(9):
+            (r, c) = ((i / 3 - 1) * 2, (i % 3 - 1) * 2)
+            positions.append(tuple(3 * NORMALS[face][k] + r * rows[k] + c * cols[k] for k in xrange(3)))
+    return positions
+
+
+FACELET_POSITIONS = _facelet_positions()
+FACELET_INDEX = dict((position, i) for (i, position) in enumerate(FACELET_POSITIONS))
+NORMAL_FACE = dict((normal, face) for (face, normal) in enumerate(NORMALS))
+
+# The rotations by 0, 120 and 240 degrees: the UD, FB and RL axis becomes the UD axis
+ROTATIONS = (IDENTITY, ROTATE_URF, _multiply(ROTATE_URF, ROTATE_URF))
+
+# All 24 rotations, IDENTITY first
+CUBE_ROTATIONS = tuple(_cube_rotations())
+
+
+def rotate(facelets, matrix):
+    """
+    The cube definition string of the cube facelets rotated by matrix. The facelets are renamed after the faces the
+    centers moved to, so the result is a valid cube definition string again.
+    """
+    result = [None] * 54
+    for (i, c) in enumerate(facelets):
+        j = FACELET_INDEX[_apply(matrix, FACELET_POSITIONS[i])]
+        result[j] = color_keys[NORMAL_FACE[_apply(matrix, NORMALS[colors[c]])]]
+    return ''.join(result)
+
+
+def rotation_maps(matrix):
+    """
+    rotate() as lookups: returns (source, faces), facelet j of the rotated cube is facelet source[j] of the cube and
+    a facelet or a move of face f becomes one of face faces[f], see rotate_solution().
+    """
+    source = [None] * 54
+    for i in xrange(54):
+        source[FACELET_INDEX[_apply(matrix, FACELET_POSITIONS[i])]] = i
+    faces = [NORMAL_FACE[_apply(matrix, NORMALS[face])] for face in xrange(6)]
+    return (source, faces)
+
+
+def inverse(facelets):
+    """The cube definition string of the inverse of the cube facelets"""
+    cc = FaceCube(facelets).toCubieCube()
+    inv = CubieCube()
+    cc.invCubieCube(inv)
+    return inv.toFaceCube().to_String()
+
+
+def parse_solution(solution):
+    """The moves of solution, a string like "R2 F' . B" as returned by Search.solution(), as (face, turns) tuples"""
+    return [(colors[move[0]], SUFFIX_TURN[move[1:]]) for move in solution.replace('.', ' ').split()]
+
+
+def format_solution(moves):
+    return ''.join('%s%s ' % (color_keys[face], TURN_SUFFIX[turns]) for (face, turns) in moves)
+
+
+def invert_solution(moves):
+    """The moves undoing moves"""
+    return [(face, 4 - turns) for (face, turns) in reversed(moves)]
+
+
+def rotate_solution(moves, matrix):
+    """The moves turning the same layers as moves after the cube was rotated by matrix"""
+    return [(NORMAL_FACE[_apply(matrix, NORMALS[face])], turns) for (face, turns) in moves]
+
+
+def variants(facelets):
+    """
+    The six variants of the cube facelets, as (rotation, inverted, variant facelets) with the index of the rotation in
+    ROTATIONS and inverted True for the inverse cube.
+    """
+    result = []
+    for inverted in (False, True):
+        cube = inverse(facelets) if inverted else facelets
+        for (rotation, matrix) in enumerate(ROTATIONS):
+            result.append((rotation, inverted, rotate(cube, matrix)))
+    return result
+
+
+def to_original(solution, rotation, inverted):
+    """Map the solution of the variant (rotation, inverted) of a cube to a solution of the cube itself"""
+    moves = rotate_solution(parse_solution(solution), _transpose(ROTATIONS[rotation]))
+    if inverted:
+        # The variant is the inverse cube C', its solution S gives C' S = 1, so C = S and S' solves C
+        moves = invert_solution(moves)
+    return format_solution(moves)
+
+
+def apply_moves(facelets, solution):
+    """The cube definition string of the cube facelets after the moves of solution"""
+    cc = FaceCube(facelets).toCubieCube()
+    for (face, turns) in parse_solution(solution):
+        for i in xrange(turns):
+            cc.cornerMultiply(moveCube[face])
+            cc.edgeMultiply(moveCube[face])
+    return cc.toFaceCube().to_String()
+
+
+def is_solution(facelets, solution):
+    """True if solution solves the cube facelets"""
+    return apply_moves(facelets, solution) == 'U' * 9 + 'R' * 9 + 'F' * 9 + 'D' * 9 + 'L' * 9 + 'B' * 9
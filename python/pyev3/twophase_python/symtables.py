@@ -0,0 +1,330 @@
+#!/usr/bin/env python
+
+"""
+Symmetry-reduced phase1 pruning.
+
+The 16 symmetries of the cube that keep the UD axis in place (rotations by 90 degrees around UD, by 180 degrees around
+FB, and their compositions with the reflection at the RL plane) map the phase1 subgroup onto itself, so a cube C and
+every conjugate S C S^-1 are the same number of moves away from it. The 2048 * 495 values of the raw flip and slice
+coordinate fall into N_FLIPSLICE_CLASS classes of conjugates. That makes a pruning table of the exact phase1 distance
+of flipslice class times twist small enough to build: 64430 * 2187 entries, 70MB packed two entries per byte. Its
+values are the real distances, where the classic Slice_Flip_Prun and Slice_Twist_Prun only give the larger of two
+lower bounds, so far fewer phase1 nodes are searched.
+
+The tables, all in prunetables/<name>.tbl:
+
+    FlipSlice_Class     class of every raw flipslice 2048 * slice + flip
+    FlipSlice_Sym       a symmetry s mapping the raw flipslice to the representative of its class: S_s C S_s^-1
+    FlipSlice_Rep       the raw flipslice of the representative of every class, the smallest one of the class
+    FlipSlice_SymState  bit s is set if the symmetry s maps the representative onto itself
+    TwistConj           twist of S_s C S_s^-1 at index 16 * twist + s
+    FlipSlice_Twist_Prun    phase1 distance of 2187 * class + TwistConj[16 * twist + sym], nibble-packed
+
+Only loading the tables needs nothing but the standard library, building them takes numpy and a few minutes.
+Nothing is built on demand:
+
+./symtables.py --build
+"""
+
+import argparse
+import logging
+import os.path
+import time
+
+import tables
+from corner import URF, UFL, ULB, UBR, DFR, DLF, DBL, DRB
+from cubiecube import CubieCube, moveCube
+from edge import UR, UF, UL, UB, DR, DF, DL, DB, FR, FL, BL, BR
+
+try:
+    import numpy
+    import tablegen
+except ImportError:
+    numpy = None
+
+log = logging.getLogger(__name__)
+
+N_SYM = 16
+N_TWIST = 2187
+N_FLIP = 2048
+N_SLICE1 = 495
+N_FLIPSLICE = N_FLIP * N_SLICE1
+N_FLIPSLICE_CLASS = 64430
+N_MOVE = 18
+
+table_names = (
+    'FlipSlice_Class',
+    'FlipSlice_Sym',
+    'FlipSlice_Rep',
+    'FlipSlice_SymState',
+    'TwistConj',
+    'FlipSlice_Twist_Prun',
+)
+
+# 180 degree rotation around the axis through the F and B centers
+cpROT_F2 = [DLF, DFR, DRB, DBL, UFL, URF, UBR, ULB]
+coROT_F2 = [0, 0, 0, 0, 0, 0, 0, 0]
+epROT_F2 = [DL, DF, DR, DB, UL, UF, UR, UB, FL, FR, BR, BL]
+eoROT_F2 = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+# 90 degree clockwise rotation around the axis through the U and D centers
+cpROT_U4 = [UBR, URF, UFL, ULB, DRB, DFR, DLF, DBL]
+coROT_U4 = [0, 0, 0, 0, 0, 0, 0, 0]
+epROT_U4 = [UB, UR, UF, UL, DB, DR, DF, DL, BR, FR, FL, BL]
+eoROT_U4 = [0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1]
+# reflection at the plane through the U, D, F and B centers, the corner orientations 3, 4, 5 are mirrored ones
+cpMIRR_LR2 = [UFL, URF, UBR, ULB, DLF, DFR, DRB, DBL]
+coMIRR_LR2 = [3, 3, 3, 3, 3, 3, 3, 3]
+epMIRR_LR2 = [UL, UF, UR, UB, DL, DF, DR, DB, FL, FR, BR, BL]
+eoMIRR_LR2 = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+
+
+def multiply(a, b):
+    """The product a * b as a new CubieCube"""
+    c = CubieCube(list(a.cp), list(a.co), list(a.ep), list(a.eo))
+    c.cornerMultiply(b)
+    c.edgeMultiply(b)
+    return c
+
+
+def _is_identity(c):
+    return c.cp == range(8) and c.co == [0] * 8 and c.ep == range(12) and c.eo == [0] * 12
+
+
+def _symmetries():
+    """The 16 symmetry cubes, symmetry 8 * f2 + 2 * u4 + lr2 is ROT_F2^f2 ROT_U4^u4 MIRR_LR2^lr2"""
+    f2 = CubieCube(cpROT_F2, coROT_F2, epROT_F2, eoROT_F2)
+    u4 = CubieCube(cpROT_U4, coROT_U4, epROT_U4, eoROT_U4)
+    lr2 = CubieCube(cpMIRR_LR2, coMIRR_LR2, epMIRR_LR2, eoMIRR_LR2)
+    result = []
+    c = CubieCube()
+    for i in xrange(2):
+        for j in xrange(4):
+            for k in xrange(2):
+                result.append(c)
+                c = multiply(c, lr2)
+            c = multiply(c, u4)
+        c = multiply(c, f2)
+    return result
+
+
+symCube = _symmetries()
+# symCube[s] * symCube[symInv[s]] is the identity
+symInv = [[t for t in xrange(N_SYM) if _is_identity(multiply(symCube[s], symCube[t]))][0] for s in xrange(N_SYM)]
+
+
+def conjugate(c, s):
+    """The cube S_s c S_s^-1"""
+    return multiply(multiply(symCube[s], c), symCube[symInv[s]])
+
+
+def conjugate_moves():
+    """
+    Return moveConj, moveConj[s][m] is the move S_s m S_s^-1. Raises ValueError if a conjugate is no move, which would
+    mean the symmetry cubes are wrong.
+    """
+    moves = []
+    for face in xrange(6):
+        c = CubieCube()
+        for turns in xrange(3):
+            c = multiply(c, moveCube[face])
+            moves.append(c)
+
+    moveConj = []
+    for s in xrange(N_SYM):
+        row = []
+        for m in moves:
+            conj = conjugate(m, s)
+            matches = [n for (n, other) in enumerate(moves) if
+                       (conj.cp, conj.co, conj.ep, conj.eo) == (other.cp, other.co, other.ep, other.eo)]
+            if not matches:
+                raise ValueError('symmetry %d does not map move %d onto a move' % (s, len(row)))
+            row.append(matches[0])
+        moveConj.append(row)
+    return moveConj
+
+
+def sym_tables_built():
+    """True if every table of the symmetry-reduced phase1 pruning is in prunetables/"""
+    return all(os.path.exists(tables.table_path(name, 'tbl')) for name in table_names)
+
+
+# ***********************************************Building the tables************************************************
+
+def build_TwistConj():
+    """TwistConj, the twist of S_s C S_s^-1 at index 16 * twist + s"""
+    table = []
+    c = CubieCube()
+    for twist in xrange(N_TWIST):
+        c.setTwist(twist)
+        for s in xrange(N_SYM):
+            # The corners of S_s C S_s^-1 are regular again for the mirrored symmetries too
+            table.append(conjugate(c, s).getTwist())
+    return numpy.array(table, dtype=numpy.uint16)
+
+
+def conjugate_flipslice(raw, s):
+    """Vectorized: the raw flipslice of S_s C S_s^-1 for the array raw of raw flipslice coordinates of cubes C"""
+    sym = symCube[s]
+    inv = symCube[symInv[s]]
+    # The orientation S_s gives to an edge only depends on whether it is a slice edge, so the UD edges, which the
+    # flipslice coordinate does not tell apart, can all be taken as UR
+    if len(set(sym.eo[:FR])) != 1 or len(set(sym.eo[FR:])) != 1:
+        raise ValueError('symmetry %d treats the edges of a layer differently' % s)
+
+    ep = tablegen.unrank_permutation(24 * (raw / N_FLIP), 12, FR, 4, reverse=True)
+    ep[ep < 0] = UR
+    eo = tablegen.unrank_orientation(raw % N_FLIP, 12, 2)
+
+    symEp = numpy.array(sym.ep)
+    symEo = numpy.array(sym.eo)
+    invEp = numpy.array(inv.ep)
+    invEo = numpy.array(inv.eo)
+    # X = S_s C, Y = X S_s^-1, see CubieCube.edgeMultiply()
+    xEp = symEp[ep]
+    xEo = (eo + symEo[ep]) % 2
+    yEp = xEp[:, invEp]
+    yEo = (invEo + xEo[:, invEp]) % 2
+
+    slice_ = tablegen.rank_permutation(yEp, FR, 4, reverse=True) / 24
+    return N_FLIP * slice_ + tablegen.rank_orientation(yEo, 2)
+
+
+def build_FlipSlice_classes(chunk=1 << 17):
+    """Return FlipSlice_Class, FlipSlice_Sym, FlipSlice_Rep and FlipSlice_SymState as numpy arrays"""
+    rep = numpy.empty(N_FLIPSLICE, dtype=numpy.int64)
+    sym = numpy.empty(N_FLIPSLICE, dtype=numpy.uint8)
+    for start in xrange(0, N_FLIPSLICE, chunk):
+        raw = numpy.arange(start, min(start + chunk, N_FLIPSLICE), dtype=numpy.int64)
+        conj = numpy.array([conjugate_flipslice(raw, s) for s in xrange(N_SYM)])
+        sym[start:start + len(raw)] = conj.argmin(axis=0)
+        rep[start:start + len(raw)] = conj.min(axis=0)
+
+    reps = numpy.unique(rep)
+    if len(reps) != N_FLIPSLICE_CLASS:
+        raise ValueError('%d flipslice classes, expected %d' % (len(reps), N_FLIPSLICE_CLASS))
+    classes = numpy.searchsorted(reps, rep).astype(numpy.uint16)
+
+    symState = numpy.zeros(N_FLIPSLICE_CLASS, dtype=numpy.uint16)
+    for s in xrange(N_SYM):
+        symState |= (conjugate_flipslice(reps, s) == reps).astype(numpy.uint16) << s
+    return (classes, sym, reps.astype(numpy.int32), symState)
+
+
+def build_FlipSlice_Twist_Prun(classes, sym, reps, symState, twistConj, chunk=1 << 22):
+    """
+    Breadth first search of the phase1 distances of all 2187 * class + twist. Expands the frontier while it is
+    smaller than the entries left, then looks for the entries left which have a neighbour in the frontier.
+
+    The cubes with the flipslice of a representative fixed by a symmetry s and the twists t and TwistConj[16 * t + s]
+    are conjugates: whenever one entry is set, those of the others are set too.
+    """
+    flipMove = tablegen.move_table('flipMove').astype(numpy.int64)
+    twistMove = tablegen.move_table('twistMove').astype(numpy.int64)
+    sliceMove = tablegen.move_table('FRtoBR_Move')[::24].astype(numpy.int64) / 24
+    classes = classes.astype(numpy.int64)
+    sym = sym.astype(numpy.int64)
+    reps = reps.astype(numpy.int64)
+    twistConj = twistConj.astype(numpy.int64)
+    symmetric = [(s, numpy.flatnonzero(symState & (1 << s))) for s in xrange(1, N_SYM)]
+    hasSymmetry = numpy.zeros(N_FLIPSLICE_CLASS, dtype=bool)
+    for (s, fixed) in symmetric:
+        hasSymmetry[fixed] = True
+
+    size = N_FLIPSLICE_CLASS * N_TWIST
+    empty = 0xff
+    dist = numpy.empty(size, dtype=numpy.uint8)
+    dist.fill(empty)
+    dist[0] = 0
+    done = 1
+    depth = 0
+
+    def neighbour(index, m):
+        rep = reps[index / N_TWIST]
+        twist = twistMove[index % N_TWIST, m]
+        raw = N_FLIP * sliceMove[rep / N_FLIP, m] + flipMove[rep % N_FLIP, m]
+        return N_TWIST * classes[raw] + twistConj[N_SYM * twist + sym[raw]]
+
+    def set_symmetric(index):
+        index = index[hasSymmetry[index / N_TWIST]]
+        for (s, fixed) in symmetric:
+            twins = index[numpy.in1d(index / N_TWIST, fixed)]
+            twins = N_TWIST * (twins / N_TWIST) + twistConj[N_SYM * (twins % N_TWIST) + s]
+            twins = twins[dist[twins] == empty]
+            dist[twins] = depth + 1
+            yield len(twins)
+
+    while done < size:
+        frontier = int((dist == depth).sum())
+        backwards = frontier > size - done
+        for start in xrange(0, size, chunk):
+            part = dist[start:start + chunk]
+            if backwards:
+                index = numpy.flatnonzero(part == empty) + start
+                for m in xrange(N_MOVE):
+                    found = dist[neighbour(index, m)] == depth
+                    dist[index[found]] = depth + 1
+                    done += int(found.sum())
+                    index = index[~found]
+            else:
+                index = numpy.flatnonzero(part == depth) + start
+                for m in xrange(N_MOVE):
+                    reached = numpy.unique(neighbour(index, m))
+                    reached = reached[dist[reached] == empty]
+                    dist[reached] = depth + 1
+                    done += len(reached) + sum(set_symmetric(reached))
+        depth += 1
+        log.info('depth %d: %d entries, %d of %d done (%s)', depth, int((dist == depth).sum()), done, size,
+                 'backwards' if backwards else 'forwards')
+        if depth > 15:
+            raise ValueError('%d entries are unreachable' % (size - done))
+
+    return tablegen.pack_nibbles(dist, size / 2)
+
+
+def build(force=False):
+    """Build the tables of table_names missing in prunetables/, or all of them with force"""
+    if numpy is None:
+        raise RuntimeError('building the symmetry tables needs numpy')
+    if not force and sym_tables_built():
+        log.info('symmetry tables already built')
+        return
+
+    conjugate_moves()
+
+    start = time.time()
+    twistConj = build_TwistConj()
+    log.info('TwistConj built in %.1fs', time.time() - start)
+
+    start = time.time()
+    (classes, sym, reps, symState) = build_FlipSlice_classes()
+    log.info('%d flipslice classes built in %.1fs', len(reps), time.time() - start)
+
+    start = time.time()
+    prun = build_FlipSlice_Twist_Prun(classes, sym, reps, symState, twistConj)
+    log.info('FlipSlice_Twist_Prun built in %.1fs', time.time() - start)
+
+    # The pruning table last: it is what sym_tables_built() waits for
+    for (name, table) in (('FlipSlice_Class', classes), ('FlipSlice_Sym', sym), ('FlipSlice_Rep', reps),
+                          ('FlipSlice_SymState', symState), ('TwistConj', twistConj),
+                          ('FlipSlice_Twist_Prun', prun)):
+        tables.write_table(tables.table_path(name, 'tbl'), table)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--build', action='store_true', help='Build the tables missing in prunetables/')
+    parser.add_argument('--force', action='store_true', help='With --build: rebuild all of them')
+    parser.add_argument('--check', action='store_true', help='Check that the symmetries map moves onto moves')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    if args.check:
+        moveConj = conjugate_moves()
+        for s in xrange(N_SYM):
+            print '%2d %s' % (s, ' '.join('%2d' % m for m in moveConj[s]))
+    if args.build:
+        start = time.time()
+        build(args.force)
+        log.info('done in %.1fs', time.time() - start)
+    if not args.check and not args.build:
+        parser.error('--build or --check is required')
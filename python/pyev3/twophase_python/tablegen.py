@@ -0,0 +1,410 @@
+#!/usr/bin/env python
+
+"""
+Vectorized generators for the twophase tables.
+
+The pruning table builders in coordcube.py visit every table index once per BFS depth and do a
+getPruning/setPruning call per step, which takes hours in CPython. The functions here expand a whole BFS frontier at
+once with numpy and pack the result into exactly the same nibble layout.
+
+The move table builders in coordcube.py go through CubieCube.setX, a multiplication and getX for all 18 moves of every
+coordinate. Here all coordinates are unranked at once into numpy arrays of cubies, only the six quarter turns are
+applied, and the half and inverse turns are derived by looking the quarter turn up again in the table being built.
+
+The output of every builder is identical to the tables in prunetables/.
+"""
+
+import argparse
+import logging
+import os.path
+import time
+
+import numpy
+
+import coordcube
+import tables
+from coordcube import CoordCube, table_builders
+from corner import URF, DLF
+from cubiecube import Cnk, moveCube
+from edge import UR, UL, UB, DF, FR
+
+log = logging.getLogger(__name__)
+
+# Moves that are not allowed in phase2: R, R', F, F', L, L', B, B'
+PHASE1_ONLY_MOVES = (3, 5, 6, 8, 12, 14, 15, 17)
+PHASE2_MOVES = tuple(j for j in xrange(CoordCube.N_MOVE) if j not in PHASE1_ONLY_MOVES)
+ALL_MOVES = tuple(xrange(CoordCube.N_MOVE))
+
+
+def move_table(name):
+    """
+    Return the move table name as a numpy array of shape (N, N_MOVE).
+
+    The binary table file is mapped without copying when it exists, otherwise CoordCube loads or builds the table.
+    """
+    path = tables.table_path(name, 'tbl')
+    if os.path.exists(path):
+        return tables.mmap_table(path)
+    return numpy.array(getattr(CoordCube, name), dtype=numpy.int32)
+
+
+def bfs(size, start, moves, apply_move):
+    """
+    Breadth first search over all size coordinate values starting at start.
+
+    apply_move(indexes, move) returns the coordinate values reached from the array indexes by one move. Returns the
+    distance of every coordinate value as a numpy int8 array.
+    """
+    dist = numpy.empty(size, dtype=numpy.int8)
+    dist.fill(-1)
+    dist[start] = 0
+    frontier = numpy.array([start], dtype=numpy.int64)
+    depth = 0
+
+    while len(frontier):
+        for move in moves:
+            reached = apply_move(frontier, move)
+            reached = reached[dist[reached] < 0]
+            dist[reached] = depth + 1
+        depth += 1
+        frontier = numpy.flatnonzero(dist == depth)
+        log.debug('depth %d: %d new entries', depth, len(frontier))
+
+    if (dist < 0).any():
+        raise ValueError('%d coordinate values are unreachable' % (dist < 0).sum())
+    return dist
+
+
+def pack_nibbles(dist, nbytes):
+    """
+    Pack one pruning value per entry into two entries per byte, entry 2i in the low and entry 2i+1 in the high nibble
+    of byte i. Like setPruning does on a table of -1 bytes, nibbles without an entry stay 0xf.
+    """
+    values = dist.astype(numpy.uint8) & 0x0f
+    packed = numpy.empty(nbytes, dtype=numpy.uint8)
+    packed.fill(0xff)
+    low = values[0::2]
+    high = values[1::2]
+    packed[:len(low)] &= 0xf0 | low
+    packed[:len(high)] &= 0x0f | (high << 4)
+    return packed
+
+
+def unpack_nibbles(packed, size):
+    """Inverse of pack_nibbles: return size entries, one pruning value per byte"""
+    values = numpy.empty(2 * len(packed), dtype=numpy.uint8)
+    values[0::2] = packed & 0x0f
+    values[1::2] = packed >> 4
+    return values[:size]
+
+
+# ***********************************************Move tables********************************************************
+# Cubie arrays hold one cube per row. A position whose cubie does not take part in the coordinate holds -1.
+
+def unrank_orientation(coords, n, base):
+    """Vectorized CubieCube.setTwist (n=8, base=3) and CubieCube.setFlip (n=12, base=2)"""
+    ori = numpy.zeros((len(coords), n), dtype=numpy.int64)
+    coords = coords.copy()
+    for i in xrange(n - 2, -1, -1):
+        ori[:, i] = coords % base
+        coords /= base
+    ori[:, n - 1] = (base - ori[:, :n - 1].sum(axis=1) % base) % base
+    return ori
+
+
+def rank_orientation(ori, base):
+    """Vectorized CubieCube.getTwist and CubieCube.getFlip"""
+    coords = numpy.zeros(len(ori), dtype=numpy.int64)
+    for i in xrange(ori.shape[1] - 1):
+        coords = base * coords + ori[:, i]
+    return coords
+
+
+def _scan_order(n, reverse):
+    """
+    Positions in the order the combination index counts them. getFRtoBR counts from BR down to UR with Cnk(11 - j, ...),
+    the other coordinates count upwards with Cnk(j, ...). That is the same scheme on reversed positions.
+    """
+    return range(n - 1, -1, -1) if reverse else range(n)
+
+
+def unrank_permutation(coords, n, first, k, reverse=False):
+    """
+    Vectorized CubieCube.setURFtoDLF, setURtoDF, setURtoUL, setUBtoDF (and setFRtoBR with reverse=True): place the k
+    cubies first..first+k-1 in an array of n positions.
+    """
+    count = len(coords)
+    rows = numpy.arange(count)[:, None]
+    fact = 1
+    for j in xrange(2, k + 1):
+        fact *= j
+    b = coords % fact   # Permutation
+    a = coords / fact   # Combination
+
+    # generate permutation from index b, perm[:, i] is the i-th cubie by position
+    perm = numpy.tile(numpy.arange(first, first + k, dtype=numpy.int64), (count, 1))
+    for j in xrange(1, k):
+        shift = b % (j + 1)
+        b = b / (j + 1)
+        # rotateRight shift times
+        cols = (numpy.arange(j + 1)[None, :] - shift[:, None]) % (j + 1)
+        perm[:, :j + 1] = perm[rows, cols]
+
+    # generate combination and set the cubies, the last one in perm goes to the highest scanned position
+    cubies = numpy.empty((count, n), dtype=numpy.int64)
+    cubies.fill(-1)
+    x = numpy.empty(count, dtype=numpy.int64)
+    x.fill(k - 1)
+    order = _scan_order(n, reverse)
+    for s in xrange(n - 1, -1, -1):
+        weight = numpy.array([Cnk(s, i + 1) if i >= 0 else 0 for i in xrange(-1, k)], dtype=numpy.int64)[x + 1]
+        place = (x >= 0) & (a - weight >= 0)
+        index = numpy.flatnonzero(place)
+        slot = x[index] if not reverse else k - 1 - x[index]
+        cubies[index, order[s]] = perm[index, slot]
+        a[index] -= weight[index]
+        x[index] -= 1
+    return cubies
+
+
+def rank_permutation(cubies, first, k, reverse=False):
+    """Vectorized CubieCube.getURFtoDLF, getURtoDF, getURtoUL, getUBtoDF (and getFRtoBR with reverse=True)"""
+    count = len(cubies)
+    rows = numpy.arange(count)[:, None]
+    n = cubies.shape[1]
+    member = (cubies >= first) & (cubies < first + k)
+
+    # compute the index a of the combination
+    a = numpy.zeros(count, dtype=numpy.int64)
+    x = numpy.zeros(count, dtype=numpy.int64)
+    for s, j in enumerate(_scan_order(n, reverse)):
+        weight = numpy.array([Cnk(s, i + 1) for i in xrange(k + 1)], dtype=numpy.int64)
+        a += numpy.where(member[:, j], weight[numpy.minimum(x, k)], 0)
+        x += member[:, j]
+
+    # the cubies of the coordinate ordered by position
+    positions = numpy.argsort(~member, axis=1, kind='mergesort')[:, :k]
+    perm = cubies[rows, positions]
+
+    # compute the index b of the permutation
+    b = numpy.zeros(count, dtype=numpy.int64)
+    for j in xrange(k - 1, 0, -1):
+        p = numpy.argmax(perm[:, :j + 1] == first + j, axis=1)
+        shift = (p + 1) % (j + 1)
+        # rotateLeft shift times
+        cols = (numpy.arange(j + 1)[None, :] + shift[:, None]) % (j + 1)
+        perm[:, :j + 1] = perm[rows, cols]
+        b = (j + 1) * b + shift
+
+    fact = 1
+    for j in xrange(2, k + 1):
+        fact *= j
+    return fact * a + b
+
+
+class Coordinate(object):
+    """A coordinate of a move table: how to unrank it to cubie arrays, apply a move and rank it again"""
+
+    def __init__(self, size, corners, unrank, rank, orientation=None):
+        self.size = size
+        self.corners = corners
+        self.unrank = unrank
+        self.rank = rank
+        self.orientation = orientation
+
+    def move(self, cubies, m):
+        """Multiply every cube in cubies with the basic move m, restricted to the coordinate"""
+        mv = moveCube[m]
+        if self.orientation is None:
+            return cubies[:, mv.cp if self.corners else mv.ep]
+        if self.corners:
+            return (cubies[:, mv.cp] + numpy.array(mv.co)) % self.orientation
+        return (cubies[:, mv.ep] + numpy.array(mv.eo)) % self.orientation
+
+
+move_coordinates = {
+    'twistMove': Coordinate(
+        CoordCube.N_TWIST, True,
+        lambda c: unrank_orientation(c, 8, 3), lambda ori: rank_orientation(ori, 3), orientation=3),
+    'flipMove': Coordinate(
+        CoordCube.N_FLIP, False,
+        lambda c: unrank_orientation(c, 12, 2), lambda ori: rank_orientation(ori, 2), orientation=2),
+    'FRtoBR_Move': Coordinate(
+        CoordCube.N_FRtoBR, False,
+        lambda c: unrank_permutation(c, 12, FR, 4, reverse=True),
+        lambda cubies: rank_permutation(cubies, FR, 4, reverse=True)),
+    'URFtoDLF_Move': Coordinate(
+        CoordCube.N_URFtoDLF, True,
+        lambda c: unrank_permutation(c, 8, URF, DLF - URF + 1), lambda cubies: rank_permutation(cubies, URF, 6)),
+    'URtoDF_Move': Coordinate(
+        CoordCube.N_URtoDF, False,
+        lambda c: unrank_permutation(c, 12, UR, DF - UR + 1), lambda cubies: rank_permutation(cubies, UR, 6)),
+    'URtoUL_Move': Coordinate(
+        CoordCube.N_URtoUL, False,
+        lambda c: unrank_permutation(c, 12, UR, UL - UR + 1), lambda cubies: rank_permutation(cubies, UR, 3)),
+    'UBtoDF_Move': Coordinate(
+        CoordCube.N_UBtoDF, False,
+        lambda c: unrank_permutation(c, 12, UB, DF - UB + 1), lambda cubies: rank_permutation(cubies, UB, 3)),
+}
+
+
+def build_move_table(name):
+    """
+    Build move table name from its six quarter turn columns.
+
+    Column 3 * j + 1 (half turn) is the quarter turn column looked up at the quarter turn result, column 3 * j + 2 the
+    same once more. URtoDF_Move only has rows for the phase2 coordinates, so where a quarter turn leaves them the
+    cubies are moved again instead.
+    """
+    coord = move_coordinates[name]
+    cubies = coord.unrank(numpy.arange(coord.size, dtype=numpy.int64))
+    table = numpy.zeros((coord.size, CoordCube.N_MOVE), dtype=numpy.int64)
+
+    for j in xrange(6):
+        moved = coord.move(cubies, j)
+        quarter = coord.rank(moved)
+        table[:, 3 * j] = quarter
+        if quarter.max() < coord.size:
+            table[:, 3 * j + 1] = quarter[quarter]
+            table[:, 3 * j + 2] = quarter[quarter[quarter]]
+        else:
+            moved = coord.move(moved, j)
+            table[:, 3 * j + 1] = coord.rank(moved)
+            table[:, 3 * j + 2] = coord.rank(coord.move(moved, j))
+    return table
+
+
+def build_MergeURtoULandUBtoDF():
+    """Vectorized coordcube.build_MergeURtoULandUBtoDF"""
+    indexes = numpy.arange(336, dtype=numpy.int64)
+    uRtoUL = move_coordinates['URtoUL_Move'].unrank(indexes)
+    uBtoDF = move_coordinates['UBtoDF_Move'].unrank(indexes)
+    a = uRtoUL[:, None, :8]
+    b = uBtoDF[None, :, :8]
+    # for i, j < 336 all six edges are in the first 8 positions
+    collision = ((a >= 0) & (b >= 0)).any(axis=2)
+    merged = numpy.where(a >= 0, a, b).reshape(336 * 336, 8)
+    merged = numpy.concatenate([merged, -numpy.ones((len(merged), 4), dtype=numpy.int64)], axis=1)
+    table = rank_permutation(merged, UR, 6).reshape(336, 336)
+    table[collision] = -1
+    return table
+
+
+# ****************************************Pruning tables for the search*********************************************
+
+def phase2_distances(perm_name):
+    """
+    Distances in phase2 of the coordinate (N_SLICE2 * perm + slice) * 2 + parity, perm being URFtoDLF or URtoDF
+    """
+    permMove = move_table(perm_name)
+    sliceMove = move_table('FRtoBR_Move')[:CoordCube.N_SLICE2].astype(numpy.int64)
+    parityMove = numpy.array(CoordCube.parityMove, dtype=numpy.int64)
+    permMove = numpy.asarray(permMove).astype(numpy.int64)
+    size = CoordCube.N_SLICE2 * len(permMove) * CoordCube.N_PARITY
+
+    def apply_move(indexes, j):
+        parity = indexes % 2
+        perm = (indexes / 2) / CoordCube.N_SLICE2
+        _slice = (indexes / 2) % CoordCube.N_SLICE2
+        return (CoordCube.N_SLICE2 * permMove[perm, j] + sliceMove[_slice, j]) * 2 + parityMove[parity, j]
+
+    return bfs(size, 0, PHASE2_MOVES, apply_move)
+
+
+def phase1_distances(ori_name):
+    """Distances to the H-subgroup of the coordinate N_SLICE1 * ori + slice, ori being twist or flip"""
+    oriMove = numpy.asarray(move_table(ori_name)).astype(numpy.int64)
+    # Slice position only: the move table row of the first permutation of each combination
+    sliceMove = move_table('FRtoBR_Move')[::CoordCube.N_SLICE2].astype(numpy.int64) / CoordCube.N_SLICE2
+    size = CoordCube.N_SLICE1 * len(oriMove)
+
+    def apply_move(indexes, j):
+        ori = indexes / CoordCube.N_SLICE1
+        _slice = indexes % CoordCube.N_SLICE1
+        return CoordCube.N_SLICE1 * oriMove[ori, j] + sliceMove[_slice, j]
+
+    return bfs(size, 0, ALL_MOVES, apply_move)
+
+
+def build_Slice_URFtoDLF_Parity_Prun():
+    dist = phase2_distances('URFtoDLF_Move')
+    return pack_nibbles(dist, len(dist) / 2)
+
+
+def build_Slice_URtoDF_Parity_Prun():
+    dist = phase2_distances('URtoDF_Move')
+    return pack_nibbles(dist, len(dist) / 2)
+
+
+def build_Slice_Twist_Prun():
+    dist = phase1_distances('twistMove')
+    # One byte more than needed, as allocated by coordcube.build_Slice_Twist_Prun
+    return pack_nibbles(dist, len(dist) / 2 + 1)
+
+
+def build_Slice_Flip_Prun():
+    dist = phase1_distances('flipMove')
+    return pack_nibbles(dist, len(dist) / 2)
+
+
+# table name -> (function building the table as a numpy array, tables that function reads)
+fast_builders = {
+    'twistMove': (lambda: build_move_table('twistMove'), ()),
+    'flipMove': (lambda: build_move_table('flipMove'), ()),
+    'FRtoBR_Move': (lambda: build_move_table('FRtoBR_Move'), ()),
+    'URFtoDLF_Move': (lambda: build_move_table('URFtoDLF_Move'), ()),
+    'URtoDF_Move': (lambda: build_move_table('URtoDF_Move'), ()),
+    'URtoUL_Move': (lambda: build_move_table('URtoUL_Move'), ()),
+    'UBtoDF_Move': (lambda: build_move_table('UBtoDF_Move'), ()),
+    'MergeURtoULandUBtoDF': (build_MergeURtoULandUBtoDF, ()),
+    'Slice_URFtoDLF_Parity_Prun': (build_Slice_URFtoDLF_Parity_Prun, ('FRtoBR_Move', 'URFtoDLF_Move')),
+    'Slice_URtoDF_Parity_Prun': (build_Slice_URtoDF_Parity_Prun, ('FRtoBR_Move', 'URtoDF_Move')),
+    'Slice_Twist_Prun': (build_Slice_Twist_Prun, ('FRtoBR_Move', 'twistMove')),
+    'Slice_Flip_Prun': (build_Slice_Flip_Prun, ('FRtoBR_Move', 'flipMove')),
+}
+
+
+def build(name):
+    """Build table name with the vectorized builder, or with the coordcube one if there is none"""
+    if name in fast_builders:
+        return fast_builders[name][0]()
+    return table_builders[name][0]()
+
+
+def compare(name, table):
+    """Return the number of entries of table that differ from the table CoordCube loads for name"""
+    expected = numpy.asarray(getattr(CoordCube, name)).astype(numpy.int64)
+    table = numpy.asarray(table).astype(numpy.int64)
+    if expected.shape != table.shape:
+        log.error('%s: shape %s, expected %s', name, table.shape, expected.shape)
+        return max(expected.size, table.size)
+    return int((expected != table).sum())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--verify', action='store_true', help='Compare the generated tables with the current ones')
+    parser.add_argument('--pickles', action='store_true', help='Verify against the pickled tables only')
+    parser.add_argument('--write', action='store_true', help='Write the generated tables to prunetables/')
+    parser.add_argument('names', nargs='*', help='Tables to generate, all of them by default')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    failed = False
+    if args.pickles:
+        coordcube.table_formats = ('pkl',)
+
+    for name in args.names or sorted(fast_builders):
+        start = time.time()
+        table = build(name)
+        log.info('%s generated in %.1fs', name, time.time() - start)
+
+        if args.verify:
+            mismatches = compare(name, table)
+            print '%-28s %s' % (name, 'ok' if not mismatches else '%d MISMATCHES' % mismatches)
+            failed = failed or mismatches
+
+        if args.write:
+            tables.write_table(tables.table_path(name, 'tbl'), table)
+
+    raise SystemExit(1 if failed else 0)
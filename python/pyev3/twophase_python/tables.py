@@ -0,0 +1,302 @@
+#!/usr/bin/env python
+
+"""
+Compact binary format for the move and pruning tables.
+
+Every table is stored in its own <name>.tbl file: a fixed 32 byte header followed by the raw little-endian table
+entries in row-major order. The header holds
+
+    magic       4s  'TPTB'
+    version     B   FORMAT_VERSION
+    typecode    c   array module typecode of one entry ('B' or 'i')
+    itemsize    B   size in bytes of one entry
+    ndim        B   1 for the pruning tables, 2 for the move tables
+    shape       6I  size of each dimension, unused dimensions are 0
+
+The files are memory-mapped read-only. read_table() copies the entries once into array.array objects for the search,
+which is far cheaper in time and memory than unpickling millions of python ints. mmap_table() returns numpy views
+straight onto the mapping for vectorized code, nothing is copied and every process mapping the same file shares the
+page cache.
+"""
+
+import argparse
+import array
+import cPickle
+import logging
+import mmap
+import os.path
+import struct
+import sys
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+log = logging.getLogger(__name__)
+
+cache_dir = os.path.join(os.path.dirname(__file__), 'prunetables')
+
+MAGIC = 'TPTB'
+FORMAT_VERSION = 1
+MAX_DIMS = 6
+HEADER = struct.Struct('<4sBcBB%dI' % MAX_DIMS)
+
+# Only typecodes whose size does not depend on the platform are allowed in a table file.
+ITEMSIZE = {
+    'b': 1,
+    'B': 1,
+    'h': 2,
+    'H': 2,
+    'i': 4,
+    'I': 4,
+}
+
+DTYPE = {
+    'b': '<i1',
+    'B': '<u1',
+    'h': '<i2',
+    'H': '<u2',
+    'i': '<i4',
+    'I': '<u4',
+}
+
+# Every table shipped as a pickle in prunetables/
+table_names = (
+    'twistMove',
+    'flipMove',
+    'FRtoBR_Move',
+    'URFtoDLF_Move',
+    'URtoDF_Move',
+    'URtoUL_Move',
+    'UBtoDF_Move',
+    'MergeURtoULandUBtoDF',
+    'Slice_URFtoDLF_Parity_Prun',
+    'Slice_URtoDF_Parity_Prun',
+    'Slice_Twist_Prun',
+    'Slice_Flip_Prun',
+)
+
+
+class TableFormatError(Exception):
+    pass
+
+
+def table_path(name, ext):
+    return os.path.join(cache_dir, '%s.%s' % (name, ext))
+
+
+def _flatten(data):
+    """Return (flat list, shape) of a table given as a list or as a list of rows"""
+    if len(data) and isinstance(data[0], (list, tuple, array.array)):
+        width = len(data[0])
+        flat = []
+        for row in data:
+            if len(row) != width:
+                raise TableFormatError('table rows have different lengths')
+            flat.extend(row)
+        return (flat, (len(data), width))
+    return (list(data), (len(data),))
+
+
+def choose_typecode(flat):
+    """
+    Pruning tables fit in one unsigned byte per entry, everything else is stored as a signed 32 bit int.
+
+    16 bit entries would be smaller but numpy keeps the entry type when a value is used in index arithmetic such as
+    (N_SLICE2 * URFtoDLF + FRtoBR) * 2, which silently overflows a 16 bit scalar.
+    """
+    if flat and min(flat) >= 0 and max(flat) <= 0xff:
+        return 'B'
+    return 'i'
+
+
+def write_table(path, data, typecode=None):
+    """
+    Write a table to path in the binary table format.
+
+    data     - list, list of equally long rows or numpy array
+    typecode - array typecode of the entries, see choose_typecode() for the default
+    """
+    if numpy is not None and isinstance(data, numpy.ndarray):
+        # Written straight from the array, large tables would not fit in memory as lists of python ints
+        shape = data.shape
+        if typecode is None:
+            typecode = choose_typecode([data.min(), data.max()] if data.size else [])
+        if typecode in DTYPE:
+            values = data.astype(DTYPE[typecode])
+    else:
+        if hasattr(data, 'tolist'):
+            data = data.tolist()
+        (flat, shape) = _flatten(data)
+        if typecode is None:
+            typecode = choose_typecode(flat)
+        if typecode in ITEMSIZE:
+            values = array.array(typecode, flat)
+            if sys.byteorder == 'big':
+                values.byteswap()
+
+    if typecode not in ITEMSIZE:
+        raise TableFormatError('unsupported typecode %r' % typecode)
+    if len(shape) > MAX_DIMS:
+        raise TableFormatError('too many dimensions: %d' % len(shape))
+
+    dims = list(shape) + [0] * (MAX_DIMS - len(shape))
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, typecode, ITEMSIZE[typecode], len(shape), *dims)
+
+    # Write to a temporary file first so a reader never maps a half written table
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        values.tofile(f)
+    os.rename(tmp_path, path)
+
+
+def read_header(path):
+    """Return (typecode, shape) of the table file at path"""
+    with open(path, 'rb') as f:
+        return _parse_header(f.read(HEADER.size), path)
+
+
+def _parse_header(buf, path):
+    if len(buf) < HEADER.size:
+        raise TableFormatError('%s: file too short' % path)
+    fields = HEADER.unpack(buf[:HEADER.size])
+    (magic, version, typecode, itemsize, ndim) = fields[:5]
+    if magic != MAGIC:
+        raise TableFormatError('%s: not a table file' % path)
+    if version != FORMAT_VERSION:
+        raise TableFormatError('%s: unsupported format version %d' % (path, version))
+    if ITEMSIZE.get(typecode) != itemsize:
+        raise TableFormatError('%s: bad typecode %r' % (path, typecode))
+    return (typecode, tuple(fields[5:5 + ndim]))
+
+
+def _map_table(path):
+    """Return (mmap, typecode, shape) of the table file at path"""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        mm = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+
+    (typecode, shape) = _parse_header(mm[:HEADER.size], path)
+    count = 1
+    for dim in shape:
+        count *= dim
+    if HEADER.size + count * ITEMSIZE[typecode] != size:
+        mm.close()
+        raise TableFormatError('%s: expected %d entries' % (path, count))
+    return (mm, typecode, shape)
+
+
+def mmap_table(path):
+    """
+    Return a read-only numpy array viewing the memory-mapped table file at path. Nothing is copied, the pages are
+    shared with every other process mapping the same file.
+    """
+    if numpy is None:
+        raise TableFormatError('numpy is required to map %s' % path)
+    (mm, typecode, shape) = _map_table(path)
+    count = (len(mm) - HEADER.size) / ITEMSIZE[typecode]
+    # The array keeps a reference to mm, the mapping lives as long as the table
+    return numpy.frombuffer(mm, dtype=DTYPE[typecode], count=count, offset=HEADER.size).reshape(shape)
+
+
+def mmap_rows(path):
+    """
+    Return (mmap, shape) of the two dimensional 'B' table file at path, whose rows are read as raw byte strings: row
+    i is mm[HEADER.size + i * shape[1]:HEADER.size + (i + 1) * shape[1]]. Needs no numpy, see nearsolved.py.
+    """
+    (mm, typecode, shape) = _map_table(path)
+    if typecode != 'B' or len(shape) != 2:
+        mm.close()
+        raise TableFormatError('%s: not a table of byte rows' % path)
+    return (mm, shape)
+
+
+def read_table(path, flat=False):
+    """
+    Read the table file at path through a memory mapping.
+
+    Returns an array.array for a one dimensional table, or with flat=True for any table with the entries in row-major
+    order, and a list of array.array rows for a two dimensional one. The
+    entries are copied once into the arrays: the search looks entries up one at a time and indexing an array.array is
+    several times faster than indexing a numpy array, whose scalars are slow to create and to compute with.
+    """
+    (mm, typecode, shape) = _map_table(path)
+    values = array.array(typecode)
+    values.fromstring(mm[HEADER.size:])
+    mm.close()
+    if sys.byteorder == 'big':
+        values.byteswap()
+
+    if len(shape) == 1 or flat:
+        return values
+    width = shape[1]
+    return [values[i:i + width] for i in xrange(0, len(values), width)]
+
+
+def convert(name, force=False):
+    """
+    Convert prunetables/<name>.pkl to prunetables/<name>.tbl
+
+    Returns True if a table file was written.
+    """
+    src = table_path(name, 'pkl')
+    dst = table_path(name, 'tbl')
+    if os.path.exists(dst) and not force:
+        log.info('%s already exists', dst)
+        return False
+
+    with open(src, 'rb') as f:
+        data = cPickle.load(f)
+
+    if name.endswith('_Prun'):
+        # Two pruning values are packed in every byte
+        typecode = 'B'
+        for (i, value) in enumerate(data):
+            if not 0 <= value <= 0xff:
+                raise TableFormatError('%s: entry %d does not fit in a byte: %d' % (name, i, value))
+    else:
+        typecode = 'i'
+
+    write_table(dst, data, typecode)
+    log.info('converted %s to %s', src, dst)
+    return True
+
+
+def verify(name):
+    """Check that prunetables/<name>.tbl holds exactly the entries of prunetables/<name>.pkl"""
+    with open(table_path(name, 'pkl'), 'rb') as f:
+        expected = _flatten(cPickle.load(f))
+    table = read_table(table_path(name, 'tbl'))
+    if hasattr(table, 'tolist'):
+        table = table.tolist()
+    return _flatten(table) == expected
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--convert', action='store_true', help='Convert the pickled tables to the binary format')
+    parser.add_argument('--verify', action='store_true', help='Compare the binary tables with the pickled ones')
+    parser.add_argument('--info', action='store_true', help='Print typecode and shape of the binary tables')
+    parser.add_argument('--force', action='store_true', help='Overwrite existing binary tables')
+    parser.add_argument('names', nargs='*', help='Tables to process, all of them by default')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    names = args.names or table_names
+
+    if args.convert:
+        for name in names:
+            convert(name, args.force)
+
+    if args.verify:
+        for name in names:
+            print '%-28s %s' % (name, 'ok' if verify(name) else 'MISMATCH')
+
+    if args.info:
+        for name in names:
+            path = table_path(name, 'tbl')
+            if os.path.exists(path):
+                (typecode, shape) = read_header(path)
+                print '%-28s %s %s %d bytes' % (name, typecode, 'x'.join(map(str, shape)), os.path.getsize(path))
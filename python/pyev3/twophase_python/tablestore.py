@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+
+"""
+Table store shared by several solver processes.
+
+TableStore.create() writes every CoordCube table into one store file, by default on /dev/shm so the file lives in
+shared memory. Each process maps that file and installs ctypes views of it as the CoordCube tables: nothing is copied
+or unpickled, attaching takes a few milliseconds and N worker processes use about one table footprint in total.
+
+The mapping is private copy-on-write (mmap.ACCESS_COPY) because ctypes can only view writable buffers. The tables are
+never written, so the pages stay shared with the store file.
+
+The store records the size and modification time of the prunetables/ file every table came from. TableStore.attach()
+creates the store again when one of them changed, e.g. after build_tables.py or tables.py --convert, so the workers
+never see the old tables.
+
+Store file layout, little-endian:
+
+    header      'TPTS', version (B), number of tables (H)
+    index       one entry per table: name (32s), typecode (c), ndim (B), shape (2I), offset (Q),
+                size (Q) and modification time (d) of its source file, 0 if it had none
+    data        the entries of every table, each table starting at a multiple of ALIGN
+"""
+
+import argparse
+import ctypes
+import logging
+import mmap
+import os
+import os.path
+import struct
+import tempfile
+import time
+
+import tables
+from coordcube import CoordCube, cache_dir, table_builders, table_formats
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+log = logging.getLogger(__name__)
+
+MAGIC = 'TPTS'
+STORE_VERSION = 2
+HEADER = struct.Struct('<4sBH')
+ENTRY = struct.Struct('<32scB2IQQd')
+ALIGN = 64
+
+CTYPE = {
+    'b': ctypes.c_int8,
+    'B': ctypes.c_uint8,
+    'h': ctypes.c_int16,
+    'H': ctypes.c_uint16,
+    'i': ctypes.c_int32,
+    'I': ctypes.c_uint32,
+}
+
+
+def default_path():
+    """The store file on /dev/shm, or in the temp directory where there is no /dev/shm"""
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(directory, 'twophase-tables-%d' % os.getuid())
+
+
+def _source_stamp(name):
+    """(size, modification time) of the file the table name is loaded from, see coordcube.find_cachetable()"""
+    for ext in table_formats:
+        path = os.path.join(cache_dir, name + '.' + ext)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            return (stat.st_size, stat.st_mtime)
+    # Built, it will be loaded from the file it is dumped to next time
+    return (0, 0.0)
+
+
+def _table_bytes(name):
+    """Return (typecode, shape, raw little-endian entries) of the table name"""
+    path = tables.table_path(name, 'tbl')
+    if os.path.exists(path):
+        (typecode, shape) = tables.read_header(path)
+        with open(path, 'rb') as f:
+            f.seek(tables.HEADER.size)
+            return (typecode, shape, f.read())
+
+    # No binary table file, let CoordCube load or build the table and convert it
+    tmp_path = path + '.store.tmp'
+    tables.write_table(tmp_path, getattr(CoordCube, name))
+    try:
+        (typecode, shape) = tables.read_header(tmp_path)
+        with open(tmp_path, 'rb') as f:
+            f.seek(tables.HEADER.size)
+            return (typecode, shape, f.read())
+    finally:
+        os.remove(tmp_path)
+
+
+class TableStore(object):
+    """The CoordCube tables mapped from a store file"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        (magic, version, count) = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != STORE_VERSION:
+            raise tables.TableFormatError('%s: not a table store' % path)
+
+        # name -> (typecode, shape, offset)
+        self.index = {}
+        # name -> (size, modification time) of its source file when the store was created
+        self.stamps = {}
+        for i in xrange(count):
+            (name, typecode, ndim, dim0, dim1, offset, size, mtime) = ENTRY.unpack_from(
+                self.mm, HEADER.size + i * ENTRY.size)
+            name = name.rstrip('\0')
+            self.index[name] = (typecode, (dim0, dim1)[:ndim], offset)
+            self.stamps[name] = (size, mtime)
+
+    @classmethod
+    def create(cls, path=None, names=None):
+        """Write the tables names (all of them by default) to the store file path and return the attached store"""
+        path = path or default_path()
+        names = sorted(names or table_builders)
+        start = time.time()
+
+        entries = []
+        offset = HEADER.size + len(names) * ENTRY.size
+        for name in names:
+            # Before reading, a table built now is dumped to its file and the store is stale once
+            stamp = _source_stamp(name)
+            (typecode, shape, data) = _table_bytes(name)
+            offset = (offset + ALIGN - 1) / ALIGN * ALIGN
+            entries.append((name, typecode, shape, offset, data, stamp))
+            offset += len(data)
+
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, STORE_VERSION, len(entries)))
+            for (name, typecode, shape, offset, data, stamp) in entries:
+                dims = list(shape) + [0] * (2 - len(shape))
+                f.write(ENTRY.pack(name, typecode, len(shape), dims[0], dims[1], offset, stamp[0], stamp[1]))
+            for (name, typecode, shape, offset, data, stamp) in entries:
+                f.write('\0' * (offset - f.tell()))
+                f.write(data)
+        os.rename(tmp_path, path)
+
+        log.info('table store %s created in %.3fs (%d bytes)', path, time.time() - start, os.path.getsize(path))
+        return cls(path)
+
+    @classmethod
+    def attach(cls, path=None, create=True):
+        """
+        Map the store file path. If create is True, it is created first if it does not exist yet, is of an older store
+        version or a table file changed since it was created.
+        """
+        path = path or default_path()
+        if not create:
+            return cls(path)
+        if not os.path.exists(path):
+            return cls.create(path)
+        try:
+            store = cls(path)
+        except tables.TableFormatError as e:
+            log.info('%s, creating it again', e)
+            return cls.create(path)
+        changed = store.changed()
+        if changed:
+            log.info('table store %s is older than %s, creating it again', path, ', '.join(changed))
+            store.close()
+            return cls.create(path)
+        return store
+
+    def changed(self):
+        """The names of the tables whose source file changed since the store was created"""
+        return sorted(name for name in self.index if self.stamps[name] != _source_stamp(name))
+
+    def close(self):
+        self.mm.close()
+
+    def flat(self, name):
+        """Zero-copy ctypes array of all entries of table name in row-major order"""
+        (typecode, shape, offset) = self.index[name]
+        count = 1
+        for dim in shape:
+            count *= dim
+        return (CTYPE[typecode] * count).from_buffer(self.mm, offset)
+
+    def table(self, name):
+        """Zero-copy ctypes view of table name, indexed like the CoordCube table: table[i] or table[i][m]"""
+        (typecode, shape, offset) = self.index[name]
+        ctype = CTYPE[typecode]
+        for dim in reversed(shape):
+            ctype = ctype * dim
+        return ctype.from_buffer(self.mm, offset)
+
+    def numpy(self, name):
+        """Zero-copy read-only numpy view of table name"""
+        (typecode, shape, offset) = self.index[name]
+        view = numpy.frombuffer(self.mm, dtype=tables.DTYPE[typecode], count=len(self.flat(name)), offset=offset)
+        view = view.reshape(shape)
+        view.flags.writeable = False
+        return view
+
+    def install(self):
+        """Use the tables of this store as the CoordCube tables"""
+        for name in self.index:
+            start = time.time()
+            setattr(CoordCube, name, self.table(name))
+            CoordCube.load_times[name] = (time.time() - start, 'store')
+
+
+def init_worker(path=None):
+    """multiprocessing.Pool initializer attaching a worker to the table store at path"""
+    TableStore.attach(path, create=False).install()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path', default=None, help='Store file, %s by default' % default_path())
+    parser.add_argument('--create', action='store_true', help='Create or refresh the store file')
+    parser.add_argument('--remove', action='store_true', help='Remove the store file')
+    parser.add_argument('--info', action='store_true', help='List the tables in the store file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    path = args.path or default_path()
+
+    if args.create:
+        TableStore.create(path)
+
+    if args.info:
+        start = time.time()
+        store = TableStore.attach(path, create=False)
+        print 'attached %s in %.1fms' % (path, (time.time() - start) * 1000)
+        changed = store.changed()
+        for name in sorted(store.index):
+            (typecode, shape, offset) = store.index[name]
+            print '%-28s %s %-10s at %d%s' % (name, typecode, 'x'.join(map(str, shape)), offset,
+                                              '  (table file changed)' if name in changed else '')
+
+    if args.remove and os.path.exists(path):
+        os.remove(path)
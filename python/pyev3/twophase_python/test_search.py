@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+
+"""
+Tests of search.py that need no tables:
+
+python -m unittest test_search
+"""
+
+import time
+import unittest
+
+import batch
+from search import Search
+
+SOLVED = 'U' * 9 + 'R' * 9 + 'F' * 9 + 'D' * 9 + 'L' * 9 + 'B' * 9
+
+
+class BestSolutionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.solve_variant = batch.solve_variant
+        self.budgets = []
+
+        def solve_variant(search, variant, maxDepth, deadline):
+            # The time the variant gets, counted from the end of the previous variant
+            self.budgets.append(deadline - time.time())
+            time.sleep(max(deadline - time.time(), 0))
+            (rotation, inverted, facelets) = variant
+            return (rotation, inverted, 'Error 8')
+
+        batch.solve_variant = solve_variant
+
+    def tearDown(self):
+        batch.solve_variant = self.solve_variant
+
+    def test_int_timeout_gives_every_variant_time(self):
+        Search().best_solution(SOLVED, 21, 3, jobs=1)
+        self.assertEqual(len(self.budgets), 6)
+        for budget in self.budgets:
+            self.assertAlmostEqual(budget, 0.5, delta=0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+
+"""
+Tests of server.py and client.py on localhost, over TCP and a unix socket. The search is a stub, they need no tables:
+
+python -m unittest test_server
+"""
+
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+import server
+from client import SolverClient, SolverError
+from verify import verify
+
+SOLVED = 'U' * 9 + 'R' * 9 + 'F' * 9 + 'D' * 9 + 'L' * 9 + 'B' * 9
+# SOLVED after R
+ONE_MOVE = 'UUFUUFUUFRRRRRRRRRFFDFFDFFDDDBDDBDDBLLLLLLLLLUBBUBBUBB'
+# SOLVED with the UF edge flipped, verify() error -3
+FLIPPED = 'UUUUUUUFURRRRRRRRRFUFFFFFFFDDDDDDDDDLLLLLLLLLBBBBBBBBB'
+
+
+class StubSearch(object):
+    """Answers the error code of Search.solution() for the cubes verify() rejects and R' for every other cube"""
+
+    def solution(self, facelets, maxDepth, timeOut, useSeparator):
+        error = verify(facelets)
+        if error:
+            return 'Error %d' % abs(error)
+        return "R' "
+
+
+class ServerTestMixin(object):
+    """The tests for the server at self.address, set up by the test cases for TCP and unix sockets"""
+
+    def setUp(self):
+        self.search_class = server.SolverHandler.search_class
+        server.SolverHandler.search_class = StubSearch
+        self.server = server.make_server(self.listen_address())
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.client = SolverClient(self.address())
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        server.SolverHandler.search_class = self.search_class
+
+    def send_line(self, line):
+        """Send line as it is on the connection of the client and return the response line"""
+        if not self.client.sock:
+            self.client.connect()
+        self.client.sock.sendall(line)
+        return self.client.f.readline()
+
+    def test_solve(self):
+        self.assertEqual(self.client.solve(ONE_MOVE), "R'")
+
+    def test_ping(self):
+        self.assertTrue(self.client.ping())
+        self.assertTrue(self.client.ping())
+
+    def test_bad_json(self):
+        self.assertIn('bad request', self.send_line('{"facelets": \n'))
+        self.assertTrue(self.client.ping())
+
+    def test_request_too_long(self):
+        response = self.send_line('{"cmd": "ping", "pad": "%s"}\n' % ('x' * server.MAX_REQUEST_LENGTH))
+        self.assertIn('longer than %d bytes' % server.MAX_REQUEST_LENGTH, response)
+        # Exactly one reply for the long request, the next one answers the ping
+        self.assertTrue(self.client.ping())
+
+    def test_invalid_cube(self):
+        with self.assertRaises(SolverError) as context:
+            self.client.solve(FLIPPED)
+        self.assertEqual(str(context.exception), 'Error 3')
+        self.assertEqual(self.client.solve(ONE_MOVE), "R'")
+
+    def test_connection_refused(self):
+        client = SolverClient(self.unused_address())
+        with self.assertRaises(socket.error):
+            client.ping()
+
+
+class TCPServerTest(ServerTestMixin, unittest.TestCase):
+
+    def listen_address(self):
+        return '127.0.0.1:0'
+
+    def address(self):
+        return '127.0.0.1:%d' % self.server.server_address[1]
+
+    def unused_address(self):
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        return '127.0.0.1:%d' % port
+
+
+class UnixServerTest(ServerTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        ServerTestMixin.setUp(self)
+
+    def tearDown(self):
+        ServerTestMixin.tearDown(self)
+        shutil.rmtree(self.directory)
+
+    def listen_address(self):
+        return os.path.join(self.directory, 'twophase.sock')
+
+    def address(self):
+        return self.listen_address()
+
+    def unused_address(self):
+        return os.path.join(self.directory, 'nobody.sock')
+
+
+if __name__ == '__main__':
+    unittest.main()
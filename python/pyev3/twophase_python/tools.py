@@ -2,10 +2,16 @@
 
 import argparse
 import random
+from color import color_keys
 from facecube import FaceCube
 from cubiecube import CubieCube
 from coordcube import CoordCube
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 def randomCube():
     """
     Generates a random cube.
@@ -23,10 +29,83 @@ def randomCube():
     fc = cc.toFaceCube()
     return fc.to_String()
 
+def permutationParity(p):
+    """Parity of every row of the array of permutations p, counted by the inversions like CubieCube.cornerParity()"""
+    s = numpy.zeros(len(p), dtype=numpy.int64)
+    for i in xrange(p.shape[1]):
+        for j in xrange(i):
+            s += p[:, j] > p[:, i]
+    return s % 2
+
+def cubieArrays(count, rng):
+    """
+    Generates count random cubes on the cubie level with the numpy RandomState rng.
+    @return (cp, co, ep, eo), arrays with a row of CubieCube.cp, co, ep and eo for every cube. Each cube of the cube
+            space has the same probability. Every cube is made from its own row of random numbers, so the first cubes
+            of a seed are the same for every count.
+    """
+    u = rng.rand(count, 8 + 12 + 7 + 11)
+    cp = u[:, :8].argsort(axis=1)
+    ep = u[:, 8:20].argsort(axis=1)
+    # Exchanging the last two edges maps the cubes with wrong parity one to one onto the solvable ones
+    odd = permutationParity(cp) != permutationParity(ep)
+    (ep[odd, 10], ep[odd, 11]) = (ep[odd, 11], ep[odd, 10])
+
+    co = numpy.empty((count, 8), dtype=numpy.int64)
+    co[:, :7] = u[:, 20:27] * 3
+    co[:, 7] = -co[:, :7].sum(axis=1) % 3
+    eo = numpy.empty((count, 12), dtype=numpy.int64)
+    eo[:, :11] = u[:, 27:] * 2
+    eo[:, 11] = eo[:, :11].sum(axis=1) % 2
+    return (cp, co, ep, eo)
+
+def faceletArrays(cp, co, ep, eo):
+    """
+    CubieCube.toFaceCube() of every row of the cubie arrays at once.
+    @return An array with the 54 facelet colors of every cube.
+    """
+    cornerFacelet = numpy.array(FaceCube.cornerFacelet)
+    cornerColor = numpy.array(FaceCube.cornerColor)
+    edgeFacelet = numpy.array(FaceCube.edgeFacelet)
+    edgeColor = numpy.array(FaceCube.edgeColor)
+
+    f = numpy.empty((len(cp), 54), dtype=numpy.uint8)
+    f[:, 4::9] = numpy.arange(6)
+    # The facelet cornerFacelet[i][n] shows the color n - co[i] of the corner at position i
+    n = numpy.arange(3)
+    f[:, cornerFacelet.ravel()] = cornerColor[cp[:, :, None], (n - co[:, :, None]) % 3].reshape(len(cp), 24)
+    n = numpy.arange(2)
+    f[:, edgeFacelet.ravel()] = edgeColor[ep[:, :, None], (n - eo[:, :, None]) % 2].reshape(len(cp), 24)
+    return f
+
+def randomCubes(count, seed=None):
+    """
+    Generates count random cubes at once with numpy, reproducibly for a seed.
+    @return (cp, co, ep, eo, facelets): the cubie arrays of cubieArrays() and the list of the cubes in the string
+            representation.
+    """
+    if numpy is None:
+        raise RuntimeError('randomCubes() needs numpy, use randomCube()')
+    (cp, co, ep, eo) = cubieArrays(count, numpy.random.RandomState(seed))
+    letters = numpy.array([ord(c) for c in color_keys], dtype=numpy.uint8)
+    text = letters[faceletArrays(cp, co, ep, eo)].tostring()
+    return (cp, co, ep, eo, [text[i:i + 54] for i in xrange(0, len(text), 54)])
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('--random', action='store_true', help='Return random cube', default=None)
+    parser.add_argument('--random-batch', type=int, help='Return this many random cubes, one per line', default=None)
+    parser.add_argument('--seed', type=int, help='With --random-batch: seed of the cubes', default=None)
+    parser.add_argument('--arrays', help='With --random-batch: also save the cubie arrays to this .npz file',
+                        default=None)
     args = parser.parse_args()
 
     if args.random:
         print randomCube()
+
+    if args.random_batch:
+        (cp, co, ep, eo, facelets) = randomCubes(args.random_batch, args.seed)
+        if args.arrays:
+            numpy.savez(args.arrays, cp=cp, co=co, ep=ep, eo=eo)
+        for cube in facelets:
+            print cube
@@ -1,8 +1,115 @@
 #!/usr/bin/env python
 
+"""
+Check cube definition strings for solvability without building FaceCube and CubieCube objects.
+
+The cubie at a corner or edge position only depends on the colors of its facelets, so FaceCube.toCubieCube() is
+precomputed for every combination of colors: CORNER_CUBIE[36 * c0 + 6 * c1 + c2] is the cubie and CORNER_ORI the
+orientation it reads from the colors c0, c1, c2 at the facelets cornerFacelet[i], EDGE_CUBIE and EDGE_ORI the same for
+the two colors of an edge. Colors no cubie has are read like toCubieCube() does, as URF or UR.
+
+verify() checks one string, verify_many() an (N, 54) numpy array of color indexes at once:
+
+./verify.py DRLUUBFBRBLURRLRUBLRDDFDLFUFUFFDBRDUBRUFLLFDDBFLUBLRBD
+./verify.py --file cubes.txt
+"""
+
 import argparse
+import sys
+from color import colors, U, D
+from corner import URF
+from edge import UR
 from facecube import FaceCube
-from color import colors
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+N_COLOR = 6
+
+
+def _corner_tables():
+    cubies = []
+    oris = []
+    for key in xrange(N_COLOR ** 3):
+        c = (key / 36, key / 6 % 6, key % 6)
+        # The first facelet with the U or D color gives the orientation, the other two colors give the cubie
+        for ori in xrange(3):
+            if c[ori] == U or c[ori] == D:
+                break
+        (col1, col2) = (c[(ori + 1) % 3], c[(ori + 2) % 3])
+        (cubie, o) = (URF, 0)
+        for (j, color) in enumerate(FaceCube.cornerColor):
+            if col1 == color[1] and col2 == color[2]:
+                (cubie, o) = (j, ori)
+                break
+        cubies.append(cubie)
+        oris.append(o)
+    return (cubies, oris)
+
+
+def _edge_tables():
+    cubies = []
+    oris = []
+    for key in xrange(N_COLOR ** 2):
+        c = (key / 6, key % 6)
+        (cubie, o) = (UR, 0)
+        for (j, color) in enumerate(FaceCube.edgeColor):
+            if c == (color[0], color[1]):
+                (cubie, o) = (j, 0)
+                break
+            if c == (color[1], color[0]):
+                (cubie, o) = (j, 1)
+                break
+        cubies.append(cubie)
+        oris.append(o)
+    return (cubies, oris)
+
+
+(CORNER_CUBIE, CORNER_ORI) = _corner_tables()
+(EDGE_CUBIE, EDGE_ORI) = _edge_tables()
+CORNER_FACELETS = [tuple(facelets) for facelets in FaceCube.cornerFacelet]
+EDGE_FACELETS = [tuple(facelets) for facelets in FaceCube.edgeFacelet]
+
+
+def _parity(p):
+    s = 0
+    for i in xrange(len(p)):
+        for j in xrange(i):
+            if p[j] > p[i]:
+                s += 1
+    return s % 2
+
+
+def verify_colors(f):
+    """verify() of the 54 color indexes f, whose colors are known to be valid and to appear 9 times each"""
+    ep = []
+    flip = 0
+    for (a, b) in EDGE_FACELETS:
+        key = N_COLOR * f[a] + f[b]
+        ep.append(EDGE_CUBIE[key])
+        flip += EDGE_ORI[key]
+    if len(set(ep)) != 12:
+        return -2
+    if flip % 2:
+        return -3
+
+    cp = []
+    twist = 0
+    for (a, b, c) in CORNER_FACELETS:
+        key = 36 * f[a] + 6 * f[b] + f[c]
+        cp.append(CORNER_CUBIE[key])
+        twist += CORNER_ORI[key]
+    if len(set(cp)) != 8:
+        return -4
+    if twist % 3:
+        return -5
+
+    if _parity(ep) != _parity(cp):
+        return -6
+    return 0
+
 
 def verify(s):
     """
@@ -17,26 +124,86 @@ def verify(s):
             -5: Twist error: One corner has to be twisted<br>
             -6: Parity error: Two corners or two edges have to be exchanged
     """
-    count = [0] * 6     # new int[6]
     try:
-        for i in xrange(54):
-            assert s[i] in colors
-            count[colors[s[i]]] += 1
-    except:
+        f = [colors[s[i]] for i in xrange(54)]
+    except (KeyError, IndexError, TypeError):
         return -1
 
-    for i in xrange(6):
-        if count[i] != 9:
+    for i in xrange(N_COLOR):
+        if f.count(i) != 9:
             return -1
+    return verify_colors(f)
+
+
+def color_array(strings):
+    """The cube definition strings as an (N, 54) array of color indexes, N_COLOR for the characters of no color"""
+    lookup = numpy.full(256, N_COLOR, dtype=numpy.uint8)
+    for (c, i) in colors.items():
+        lookup[ord(c)] = i
+    strings = list(strings)
+    for s in strings:
+        if len(s) != 54:
+            raise ValueError('not 54 facelets: %r' % s)
+    return lookup[numpy.frombuffer(''.join(strings), dtype=numpy.uint8)].reshape(len(strings), 54)
+
+
+def _parity_many(p):
+    s = numpy.zeros(len(p), dtype=numpy.int64)
+    for i in xrange(p.shape[1]):
+        for j in xrange(i):
+            s += p[:, j] > p[:, i]
+    return s % 2
+
+
+def verify_many(f):
+    """
+    verify() of many cubes at once.
+
+    @param f is an (N, 54) array of the color indexes of the facelets of N cubes, see color_array(). Without numpy
+             it may be a list of lists and the cubes are checked one by one.
+    @return An array of the N error codes of verify().
+    """
+    if numpy is None:
+        return [-1 if any(row.count(i) != 9 for i in xrange(N_COLOR)) else verify_colors(row) for row in f]
+
+    f = numpy.asarray(f, dtype=numpy.int64)
+    counts = (f[:, :, None] == numpy.arange(N_COLOR)).sum(axis=1)
+    badColors = (counts != 9).any(axis=1)
+    # Rows with bad colors are looked up as U facelets, their result is -1 anyway
+    f = numpy.where((f >= 0) & (f < N_COLOR), f, 0)
+
+    edges = numpy.array(EDGE_FACELETS)
+    key = N_COLOR * f[:, edges[:, 0]] + f[:, edges[:, 1]]
+    ep = numpy.array(EDGE_CUBIE)[key]
+    eo = numpy.array(EDGE_ORI)[key]
+    corners = numpy.array(CORNER_FACELETS)
+    key = 36 * f[:, corners[:, 0]] + 6 * f[:, corners[:, 1]] + f[:, corners[:, 2]]
+    cp = numpy.array(CORNER_CUBIE)[key]
+    co = numpy.array(CORNER_ORI)[key]
 
-    fc = FaceCube(s)
-    cc = fc.toCubieCube()
+    result = numpy.zeros(len(f), dtype=numpy.int64)
+    # Assigned from the last check to the first, the first failing check gives the code like in verify()
+    result[_parity_many(ep) != _parity_many(cp)] = -6
+    result[co.sum(axis=1) % 3 != 0] = -5
+    result[(numpy.sort(cp, axis=1) != numpy.arange(8)).any(axis=1)] = -4
+    result[eo.sum(axis=1) % 2 != 0] = -3
+    result[(numpy.sort(ep, axis=1) != numpy.arange(12)).any(axis=1)] = -2
+    result[badColors] = -1
+    return result
 
-    return cc.verify()
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('facelet', help='Facelet string', default=None)
+    parser.add_argument('facelet', nargs='?', help='Facelet string', default=None)
+    parser.add_argument('--file', help='Check the facelet strings in this file, one per line, - for stdin', default=None)
     args = parser.parse_args()
 
-    print verify(args.facelet)
+    if args.file:
+        f = sys.stdin if args.file == '-' else open(args.file)
+        strings = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        for (s, code) in zip(strings, verify_many(color_array(strings))):
+            print s, code
+    elif args.facelet:
+        print verify(args.facelet)
+    else:
+        parser.error('a facelet string or --file is required')